@@ -34,6 +34,8 @@ INSTALLED_APPS = [
     'pages',
     'layout',
     'jusutils',
+    'medialib',
+    'taskqueue',
 
     'grappelli',
     'nested_admin',
@@ -43,11 +45,18 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.sites',
     'django.contrib.staticfiles',
 ]
 
+# The site served for hosts that match no Site domain. Every other Site is
+# served from the same process, see pages.sites.
+SITE_ID = 1
+
 MIDDLEWARE_CLASSES = [
     'django.middleware.security.SecurityMiddleware',
+    'jusutils.middleware.ImmutableAssetsMiddleware',
+    'jusutils.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -91,6 +100,27 @@ DATABASES = {
     }
 }
 
+# Public page reads can be sent to read replicas. Add each replica to
+# DATABASES and list its alias in JUSCMS_READ_REPLICAS. The 'replica' alias
+# below is the primary database itself, which sends reads through the
+# replica code path without a real replica; the tests list it, and it
+# mirrors the test database. To try it locally with a copy of the SQLite
+# database, point its NAME at e.g. replica.sqlite3 and list it:
+#
+# JUSCMS_READ_REPLICAS = ['replica']
+
+DATABASES['replica'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    'TEST': {'MIRROR': 'default'},
+}
+
+JUSCMS_READ_REPLICAS = []
+
+DATABASE_ROUTERS = [
+    'jusutils.routers.ReplicaRouter',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.9/ref/settings/#auth-password-validators
@@ -136,6 +166,10 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = os.path.join(os.path.dirname(BASE_DIR), 'static_root')
 
+# collectstatic copies static files under content-hashed names and writes a
+# manifest that {% static %} resolves names through.
+STATICFILES_STORAGE = 'jusutils.storage.ManifestStaticFilesStorage'
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(os.path.dirname(BASE_DIR), 'media_root')
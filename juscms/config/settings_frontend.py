@@ -0,0 +1,57 @@
+"""
+Settings for serving public pages only.
+
+Workers started with these settings (see config/wsgi_frontend.py) load just
+the apps, middleware and URLs that BaseView and the layout template tags
+need. The admin, sessions, messages, authentication and CSRF protection are
+left out, which shortens startup, lowers the memory used by each worker and
+removes their per-request middleware work. Run the admin from a separate set
+of workers using config.settings.
+
+Both sets of workers must use a page cache shared between processes, such as
+memcached or a database cache, set up in CACHES and 'JUSCMS_PAGE_CACHE' of
+config.settings. Saves in the admin workers invalidate cached pages and
+fragments and bump the routes version in the page cache, so with the default
+cache, local to each process, frontend workers would serve edited pages for
+up to 'JUSCMS_PAGE_CACHE_TIMEOUT' seconds and answer new pages with a 404.
+These settings enable the pages.E001 system check, which fails on a cache
+local to the process, and config/wsgi_frontend.py runs it on startup.
+
+Compare both modes with 'python manage.py benchmodes'.
+"""
+
+import copy
+
+from .settings import *  # noqa: F401,F403
+
+
+INSTALLED_APPS = [
+    'pages',
+    'layout',
+    'jusutils',
+    'medialib',
+    'taskqueue',
+
+    'django.contrib.sites',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE_CLASSES = [
+    'django.middleware.security.SecurityMiddleware',
+    'jusutils.middleware.ImmutableAssetsMiddleware',
+    'jusutils.middleware.ReplicaMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'config.urls_frontend'
+
+# Copied, since the imported TEMPLATES is the list config.settings uses.
+TEMPLATES = copy.deepcopy(TEMPLATES)  # noqa: F405
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    'django.template.context_processors.request',
+]
+
+WSGI_APPLICATION = 'config.wsgi_frontend.application'
+
+JUSCMS_FRONTEND_ONLY = True
@@ -0,0 +1,23 @@
+"""juscms frontend URL Configuration
+
+Only routes public pages. Used by config.settings_frontend.
+"""
+from django.conf import settings
+from django.conf.urls import url, include
+from django.conf.urls.static import static
+
+urlpatterns = [
+    url(
+        r'^',
+        include(
+            'pages.urls',
+            namespace='pages',
+        ),
+    ),
+]
+
+if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL,
+        document_root=settings.MEDIA_ROOT,
+    )
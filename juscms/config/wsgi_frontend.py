@@ -0,0 +1,26 @@
+"""
+WSGI config for serving juscms public pages only.
+
+It exposes the WSGI callable as a module-level variable named ``application``
+using config.settings_frontend, which leaves out the admin and everything it
+needs. See that module for details.
+"""
+
+import os
+
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_frontend")
+
+application = get_wsgi_application()
+
+# WSGI servers run no system checks, so the checks that keep the frontend
+# workers in sync with the admin workers, see pages.checks, are run here.
+errors = [
+    error for error in checks.run_checks(tags=['juscms'])
+    if error.is_serious() and not error.is_silenced()
+]
+if errors:
+    raise ImproperlyConfigured('\n'.join(str(error) for error in errors))
@@ -0,0 +1,132 @@
+import zlib
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, When, Value
+
+
+# Rows copied per UPDATE statement by copy_field. Each row takes three query
+# parameters, which keeps a batch below SQLite's limit of 999.
+BATCH_SIZE = 300
+
+# The first byte of a stored value tells how the rest is encoded. The empty
+# string is stored as an empty value.
+RAW = b'\x00'
+ZLIB = b'\x01'
+
+
+def compress(text):
+    """
+    Encodes text for a CompressedTextField. Text of at least
+    'JUSCMS_COMPRESS_THRESHOLD' bytes, 1024 by default, is compressed with
+    zlib when that makes it smaller. Shorter text is stored as UTF-8, since
+    compressing it saves little and costs time on every read.
+
+    Returns:
+        value(bytes): The encoded text.
+    """
+    if not text:
+        return b''
+    data = text.encode('utf-8')
+    threshold = getattr(settings, 'JUSCMS_COMPRESS_THRESHOLD', 1024)
+    if len(data) >= threshold:
+        level = getattr(settings, 'JUSCMS_COMPRESS_LEVEL', 6)
+        compressed = zlib.compress(data, level)
+        if len(compressed) < len(data):
+            return ZLIB + compressed
+    return RAW + data
+
+
+def decompress(value):
+    """
+    Decodes a value stored by a CompressedTextField.
+
+    Returns:
+        text(string): The decoded text.
+    """
+    value = bytes(value)
+    if not value:
+        return ''
+    if value[:1] == ZLIB:
+        value = zlib.decompress(value[1:])
+    else:
+        value = value[1:]
+    return value.decode('utf-8')
+
+
+class CompressedTextField(models.TextField):
+    """
+    A TextField stored in a binary column, compressed above a size threshold,
+    see compress. It behaves like a TextField everywhere else: model
+    instances, values() and forms see plain text.
+
+    Only exact lookups are supported, since the database cannot look inside
+    compressed values.
+    """
+    description = 'Compressed text'
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection, context):
+        if value is None:
+            return value
+        return decompress(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return decompress(value)
+        return super(CompressedTextField, self).to_python(value)
+
+    def get_prep_value(self, value):
+        value = super(CompressedTextField, self).get_prep_value(value)
+        if value is None:
+            return value
+        return compress(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super(CompressedTextField, self).get_db_prep_value(
+            value,
+            connection,
+            prepared,
+        )
+        if value is not None:
+            return connection.Database.Binary(value)
+        return value
+
+
+def copy_field(model, source, target):
+    """
+    Copies the value of one field to another for every row of a model, in
+    batches of BATCH_SIZE rows with one UPDATE each, so large tables are
+    neither loaded into memory at once nor updated row by row. Used by the
+    migrations that convert TextFields to CompressedTextFields, where
+    'target' encodes the values while they are written.
+
+    Parameters:
+        model(object): The model class, usually a historical model from a
+            migration's app registry.
+        source(string): The name of the field to copy from.
+        target(string): The name of the field to copy to.
+    """
+    manager = model._default_manager
+    output_field = model._meta.get_field(target)
+    last_pk = None
+    while True:
+        rows = manager.order_by('pk')
+        if last_pk is not None:
+            rows = rows.filter(pk__gt=last_pk)
+        rows = list(rows.values_list('pk', source)[:BATCH_SIZE])
+        if not rows:
+            return
+        with transaction.atomic():
+            manager.filter(pk__in=[pk for pk, value in rows]).update(**{
+                target: Case(
+                    *[
+                        When(pk=pk, then=Value(value, output_field))
+                        for pk, value in rows
+                    ],
+                    output_field=output_field
+                ),
+            })
+        last_pk = rows[-1][0]
@@ -0,0 +1,146 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.models import Page
+
+
+# Runs in a fresh interpreter per measurement so that startup time and memory
+# are not affected by what this process has already imported.
+CHILD = '''
+import io, json, os, sys, time
+
+def rss_kb():
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+
+started = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+from django.utils.module_loading import import_string
+# A single process needs no page cache shared with admin workers.
+settings.SILENCED_SYSTEM_CHECKS = ['pages.E001']
+application = import_string(settings.WSGI_APPLICATION)
+startup = time.perf_counter() - started
+rss_startup = rss_kb()
+
+path, requests = sys.argv[1], int(sys.argv[2])
+status = []
+
+def start_response(line, headers, exc_info=None):
+    status.append(line)
+
+def get():
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SCRIPT_NAME': '', 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': '127.0.0.1', 'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(), 'wsgi.multithread': False,
+        'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    response = application(environ, start_response)
+    for chunk in response:
+        pass
+    response.close()
+
+for i in range(min(requests, 50)):
+    get()
+started = time.perf_counter()
+for i in range(requests):
+    get()
+per_request = (time.perf_counter() - started) / requests
+
+print(json.dumps({
+    'startup': startup,
+    'rss_startup': rss_startup,
+    'rss_end': rss_kb(),
+    'per_request': per_request,
+    'modules': len(sys.modules),
+    'status': status[-1],
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares startup time, memory and per-request time of the full '
+        'settings and the frontend-only settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=None,
+            help='URL path to request. Defaults to the first page.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Number of timed requests per run.',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Number of fresh processes per mode. The median is shown.',
+        )
+        parser.add_argument(
+            '--modes',
+            nargs='+',
+            default=['config.settings', 'config.settings_frontend'],
+            help='Settings modules to compare.',
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/statm'):
+            raise CommandError('benchmodes needs /proc to measure memory.')
+        path = options['path']
+        if path is None:
+            page = Page.objects.exclude(path='').first()
+            path = '/' + page.path if page else '/'
+
+        self.stdout.write('Requesting %s, %d requests, %d runs per mode' % (
+            path, options['requests'], options['runs'],
+        ))
+        self.stdout.write('%-28s %10s %10s %10s %10s %8s' % (
+            'Settings', 'Startup ms', 'RSS KB', 'RSS end', 'Request us',
+            'Modules',
+        ))
+        for mode in options['modes']:
+            runs = [
+                self.measure(mode, path, options['requests'])
+                for i in range(options['runs'])
+            ]
+
+            def median(key):
+                values = sorted(run[key] for run in runs)
+                return values[len(values) // 2]
+
+            self.stdout.write('%-28s %10.1f %10d %10d %10.1f %8d' % (
+                mode,
+                median('startup') * 1000,
+                median('rss_startup'),
+                median('rss_end'),
+                median('per_request') * 1000000,
+                median('modules'),
+            ))
+            if not runs[0]['status'].startswith('200'):
+                self.stderr.write('%s answered %s' % (mode, runs[0]['status']))
+
+    def measure(self, mode, path, requests):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=mode)
+        output = subprocess.check_output(
+            [sys.executable, '-c', CHILD, path, str(requests)],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        return json.loads(output.decode('utf-8').strip().splitlines()[-1])
@@ -0,0 +1,253 @@
+import io
+import os
+import random
+import resource
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent import futures
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.utils.module_loading import import_string
+
+from pages.models import Page
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which 'fraction' of the sorted values fall.
+    """
+    if not values:
+        return 0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def rss_kb():
+    """
+    Returns the resident set size of this process in kilobytes. Falls back to
+    the peak resident set size where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (IOError, OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Result(object):
+    __slots__ = ('path', 'status', 'seconds', 'queries', 'size')
+
+    def __init__(self, path, status, seconds, queries, size):
+        self.path = path
+        self.status = status
+        self.seconds = seconds
+        self.queries = queries
+        self.size = size
+
+
+class Command(BaseCommand):
+    help = (
+        'Load tests the WSGI application in-process by replaying a mix of '
+        'page paths from a pool of threads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Number of concurrent client threads.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Number of measured requests.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=100,
+            help='Number of unmeasured requests sent first.',
+        )
+        parser.add_argument(
+            '--not-found',
+            type=float,
+            default=0.1,
+            help='Fraction of requests for paths that do not exist.',
+        )
+        parser.add_argument(
+            '--home',
+            type=float,
+            default=0.2,
+            help='Fraction of requests for the home page.',
+        )
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='Host header sent with each request.',
+        )
+        parser.add_argument(
+            '--tracemalloc',
+            action='store_true',
+            help='Trace Python allocations to report memory growth. Slows '
+                 'requests down considerably.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed for a reproducible request mix.',
+        )
+
+    def handle(self, *args, **options):
+        self.application = import_string(settings.WSGI_APPLICATION)
+        self.host = options['host']
+        paths = self.build_mix(options)
+        warmup = paths[:options['warmup']]
+        measured = paths[options['warmup']:]
+
+        self.run(warmup, options['threads'])
+
+        if options['tracemalloc']:
+            tracemalloc.start()
+        memory_before = rss_kb()
+        started = time.time()
+        results = self.run(measured, options['threads'])
+        elapsed = time.time() - started
+        memory_after = rss_kb()
+        traced = None
+        if options['tracemalloc']:
+            traced = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        self.report(results, elapsed, memory_before, memory_after, traced)
+
+    def build_mix(self, options):
+        """
+        Builds the list of request paths: page paths weighted evenly, the
+        home page, and random paths that return 404.
+        """
+        rng = random.Random(options['seed'])
+        page_paths = [
+            path for path in Page.objects.values_list('path', flat=True)
+            if path
+        ]
+        total = options['warmup'] + options['requests']
+        paths = []
+        for i in range(total):
+            roll = rng.random()
+            if roll < options['not_found'] or not page_paths:
+                token = uuid.UUID(int=rng.getrandbits(128))
+                paths.append('missing-%s/' % token)
+            elif roll < options['not_found'] + options['home']:
+                paths.append('')
+            else:
+                paths.append(rng.choice(page_paths))
+        return paths
+
+    def run(self, paths, threads):
+        with futures.ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(self.request, paths))
+            # Every pool thread opened its own connections. Each thread
+            # waits at the barrier until all of them hold one of these
+            # calls, so every thread closes its connections exactly once.
+            barrier = threading.Barrier(threads)
+            list(pool.map(self.close_connections, [barrier] * threads))
+        self.close_connections()
+        return results
+
+    def close_connections(self, barrier=None):
+        """
+        Closes the database connections of the calling thread, after waiting
+        at a barrier if one is given.
+        """
+        if barrier is not None:
+            barrier.wait()
+        for connection in connections.all():
+            connection.close()
+
+    def request(self, path):
+        """
+        Sends one GET request through the WSGI application and measures it.
+        Queries are counted on this thread's connections.
+        """
+        status = []
+
+        def start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split(' ', 1)[0]))
+
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': '/' + path,
+            'QUERY_STRING': '',
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': self.host,
+            'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        captures = [CaptureQueriesContext(c) for c in connections.all()]
+        for capture in captures:
+            capture.__enter__()
+        started = time.perf_counter()
+        try:
+            response = self.application(environ, start_response)
+            try:
+                size = sum(len(chunk) for chunk in response)
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+        finally:
+            seconds = time.perf_counter() - started
+            for capture in captures:
+                capture.__exit__(None, None, None)
+        queries = sum(len(capture) for capture in captures)
+        return Result(path, status[0], seconds, queries, size)
+
+    def report(self, results, elapsed, memory_before, memory_after, traced):
+        latencies = sorted(result.seconds * 1000 for result in results)
+        statuses = {}
+        for result in results:
+            statuses[result.status] = statuses.get(result.status, 0) + 1
+        queries = [result.queries for result in results]
+
+        write = self.stdout.write
+        write('Requests:    %d in %.2fs' % (len(results), elapsed))
+        write('Throughput:  %.1f requests/s' % (len(results) / elapsed))
+        write('Status:      %s' % ', '.join(
+            '%s: %d' % item for item in sorted(statuses.items())
+        ))
+        write('Latency ms:  %s' % '  '.join(
+            'p%d %.2f' % (fraction * 100, percentile(latencies, fraction))
+            for fraction in (0.5, 0.9, 0.95, 0.99)
+        ) + '  max %.2f' % (latencies[-1] if latencies else 0))
+        write('Queries:     %.2f per request, %d max, %d total' % (
+            sum(queries) / float(len(queries) or 1),
+            max(queries or [0]),
+            sum(queries),
+        ))
+        write('RSS:         %d KB -> %d KB (+%d KB)' % (
+            memory_before,
+            memory_after,
+            memory_after - memory_before,
+        ))
+        if traced is not None:
+            write('Traced:      %d KB current, %d KB peak' % (
+                traced[0] // 1024,
+                traced[1] // 1024,
+            ))
@@ -0,0 +1,77 @@
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+
+from . import routers
+
+
+PIN_COOKIE = 'juscms_primary'
+
+# File names containing a content hash: 'main.0123456789ab.css' as written by
+# ManifestStaticFilesStorage, or 'media/variants/<hash>.jpg' as written by
+# medialib.
+HASHED_NAME = re.compile(r'[./][0-9a-f]{12,}\.\w+$')
+
+
+class ReplicaMiddleware(object):
+    """
+    Decides which requests may read from the read replicas. Only GET and HEAD
+    requests outside of the admin are allowed to. After a request writes to
+    the database, a cookie pins the client to the primary for
+    'JUSCMS_REPLICA_PIN_SECONDS' seconds so an editor sees their own changes
+    even if the replicas have not caught up yet.
+    """
+    def process_request(self, request):
+        primary_paths = getattr(settings, 'JUSCMS_PRIMARY_PATHS', [
+            '/admin/',
+            '/grappelli/',
+            '/nested_admin/',
+        ])
+        use_replicas = (
+            request.method in ('GET', 'HEAD') and
+            PIN_COOKIE not in request.COOKIES and
+            not request.path.startswith(tuple(primary_paths))
+        )
+        routers.begin_request(use_replicas)
+
+    def process_response(self, request, response):
+        if routers.end_request():
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=getattr(settings, 'JUSCMS_REPLICA_PIN_SECONDS', 10),
+                httponly=True,
+            )
+        return response
+
+
+class ImmutableAssetsMiddleware(object):
+    """
+    Marks responses for content-hashed static and media files as cacheable
+    forever. Their names change whenever their content does, so browsers
+    never need to revalidate them and repeat visitors fetch no asset bytes
+    at all. Compiled page stylesheets get the same headers from
+    pages.views.StyleView.
+
+    Only applies when Django serves the files itself, e.g. the media URLs in
+    DEBUG mode. A web server serving STATIC_ROOT and MEDIA_ROOT should send
+    the same headers for hashed names.
+    """
+    def process_response(self, request, response):
+        if response.status_code != 200:
+            return response
+        prefixes = tuple(
+            prefix for prefix in (settings.STATIC_URL, settings.MEDIA_URL)
+            if prefix
+        )
+        if request.path.startswith(prefixes) and HASHED_NAME.search(
+            request.path,
+        ):
+            patch_cache_control(
+                response,
+                public=True,
+                immutable=True,
+                max_age=getattr(settings, 'JUSCMS_ASSET_MAX_AGE', 31536000),
+            )
+        return response
@@ -0,0 +1,182 @@
+import re
+
+
+# Elements whose content is copied verbatim. Whitespace is significant in
+# 'pre' and 'textarea', and 'script' and 'style' are not HTML.
+RAW_ELEMENTS = ('pre', 'textarea', 'script', 'style')
+# Comments starting with these are kept: conditional comments and the
+# markers the page cache stitches fragments into.
+KEEP_COMMENTS = ('<!--[', '<!--juscms:')
+
+TAG = re.compile(
+    r'<(/?)([a-zA-Z][a-zA-Z0-9:-]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+)
+ATTRIBUTE = re.compile(
+    r'([^\s=/]+|/)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s"\'>]+))?',
+)
+# The start of a tag that may continue in the next chunk, possibly inside a
+# quoted attribute value.
+PARTIAL_TAG = re.compile(
+    r'</?[a-zA-Z][a-zA-Z0-9:-]*(?:[^>"\']|"[^"]*"|\'[^\']*\')*'
+    r'(?:"[^"]*|\'[^\']*)?$',
+)
+WHITESPACE = re.compile(r'\s+')
+TRAILING_WHITESPACE = re.compile(r'\s+$')
+
+
+def _minify_tag(match):
+    slash, name, attributes = match.groups()
+    tag = ['<', slash, name.lower()]
+    for attribute, value in ATTRIBUTE.findall(attributes):
+        tag.append(' ' + attribute)
+        if value:
+            tag.append('=' + value)
+    tag.append('>')
+    return ''.join(tag)
+
+
+class HTMLMinifier(object):
+    """
+    A streaming HTML minifier. Collapses runs of whitespace between and
+    around tags into one space, normalizes the whitespace inside tags, so
+    empty attribute scaffolding such as '<div   >' becomes '<div>', and drops
+    comments. The content of 'pre', 'textarea', 'script' and 'style'
+    elements, attribute values and conditional comments are left untouched.
+
+    Whitespace is collapsed rather than removed, so inline content renders
+    exactly as before.
+
+    Input can be fed in chunks of any size; input that may continue in the
+    next chunk, like an unfinished tag, is held back until it is complete:
+
+        minifier = HTMLMinifier()
+        for chunk in chunks:
+            output.write(minifier.feed(chunk))
+        output.write(minifier.close())
+
+    Attributes:
+        buffer(string): Input that has not been minified yet.
+        raw(string): The name of the raw element being copied, if any.
+        space(boolean): Whether the output so far ends in collapsed
+            whitespace, so whitespace following a dropped comment is not
+            doubled. Starts out True, dropping leading whitespace.
+    """
+    def __init__(self):
+        self.buffer = ''
+        self.raw = None
+        self.space = True
+
+    def feed(self, data):
+        """
+        Minifies as much of the input seen so far as possible.
+
+        Returns:
+            output(string): The minified output for this chunk.
+        """
+        self.buffer += data
+        return self._minify(final=False)
+
+    def close(self):
+        """
+        Minifies the remaining input.
+
+        Returns:
+            output(string): The rest of the minified output.
+        """
+        return self._minify(final=True)
+
+    def _text(self, text):
+        text = WHITESPACE.sub(' ', text)
+        if self.space and text.startswith(' '):
+            text = text[1:]
+        if text:
+            self.space = text.endswith(' ')
+        return text
+
+    def _minify(self, final):
+        buffer = self.buffer
+        position = 0
+        output = []
+        while position < len(buffer):
+            if self.raw is not None:
+                end = re.compile(r'</%s[\s>]' % self.raw, re.I).search(
+                    buffer,
+                    position,
+                )
+                if end is None:
+                    # Hold back what could be the start of the end tag.
+                    keep = 0 if final else len(self.raw) + 3
+                    stop = max(position, len(buffer) - keep)
+                    output.append(buffer[position:stop])
+                    position = stop
+                    break
+                output.append(buffer[position:end.start()])
+                self.space = False
+                position = end.start()
+                self.raw = None
+
+            start = buffer.find('<', position)
+            if start == -1:
+                text = buffer[position:]
+                if not final:
+                    # Whitespace may continue in the next chunk.
+                    trailing = TRAILING_WHITESPACE.search(text)
+                    if trailing is not None:
+                        text = text[:trailing.start()]
+                output.append(self._text(text))
+                position += len(text)
+                break
+            output.append(self._text(buffer[position:start]))
+            position = start
+
+            if buffer.startswith('<!--', start):
+                end = buffer.find('-->', start + 4)
+                if end == -1:
+                    if not final:
+                        break
+                    end = len(buffer) - 3
+                comment = buffer[start:end + 3]
+                if comment.startswith(KEEP_COMMENTS):
+                    output.append(comment)
+                    self.space = False
+                position = end + 3
+                continue
+
+            match = TAG.match(buffer, start)
+            if match is not None:
+                output.append(_minify_tag(match))
+                self.space = False
+                name = match.group(2).lower()
+                if not match.group(1) and name in RAW_ELEMENTS:
+                    self.raw = name
+                position = match.end()
+                continue
+
+            end = buffer.find('>', start)
+            if not final and (
+                end == -1 or PARTIAL_TAG.match(buffer, start) is not None
+            ):
+                # An unfinished tag or doctype, or a literal '<' that cannot
+                # be told apart from one yet.
+                break
+            if buffer.startswith(('<!', '<?'), start) and end != -1:
+                output.append(buffer[start:end + 1])
+                position = end + 1
+            else:
+                output.append('<')
+                position = start + 1
+            self.space = False
+
+        self.buffer = buffer[position:]
+        return ''.join(output)
+
+
+def minify_html(html):
+    """
+    Minifies a complete HTML document, see HTMLMinifier.
+
+    Returns:
+        html(string): The minified document.
+    """
+    minifier = HTMLMinifier()
+    return minifier.feed(html) + minifier.close()
@@ -1,3 +1,15 @@
 from django.db import models
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
 
+from . import routers
 
+
+@receiver(post_save)
+@receiver(post_delete)
+def record_write(sender, **kwargs):
+    """
+    Pins the rest of the current request, and the client for a short while
+    after it, to the primary database once anything has been written.
+    """
+    routers.record_write()
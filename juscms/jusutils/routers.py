@@ -0,0 +1,113 @@
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, DatabaseError
+
+
+state = threading.local()
+replica_counter = itertools.count()
+replica_down_until = {}
+replica_checked_until = {}
+
+
+def begin_request(use_replicas):
+    """
+    Called at the start of each request. Reads are only sent to replicas for
+    requests marked here, everything else, including management commands and
+    background threads, uses the primary database.
+    """
+    state.use_replicas = use_replicas
+    state.wrote = False
+
+
+def end_request():
+    """
+    Called at the end of each request.
+
+    Returns:
+        wrote(boolean): True if the request wrote to the database.
+    """
+    wrote = getattr(state, 'wrote', False)
+    state.use_replicas = False
+    state.wrote = False
+    return wrote
+
+
+def record_write():
+    """
+    Marks the current request as having written to the database. Connected
+    to the model save and delete signals, and called directly by code that
+    writes with QuerySet.update or bulk_create, which send no signals. Any
+    later reads in the request are sent to the primary.
+    """
+    state.wrote = True
+    state.use_replicas = False
+
+
+def is_healthy(alias):
+    """
+    Checks that a replica accepts connections. A replica that passes is not
+    checked again for 'JUSCMS_REPLICA_CHECK_SECONDS' seconds, and one that
+    fails is skipped for 'JUSCMS_REPLICA_RETRY_SECONDS' seconds before it is
+    tried again.
+    """
+    now = time.time()
+    if replica_down_until.get(alias, 0) > now:
+        return False
+    if replica_checked_until.get(alias, 0) > now:
+        return True
+    try:
+        connection = connections[alias]
+        connection.ensure_connection()
+        if not connection.is_usable():
+            raise DatabaseError('Connection to %s is not usable' % alias)
+    except DatabaseError:
+        retry = getattr(settings, 'JUSCMS_REPLICA_RETRY_SECONDS', 30)
+        replica_down_until[alias] = now + retry
+        return False
+    check = getattr(settings, 'JUSCMS_REPLICA_CHECK_SECONDS', 5)
+    replica_checked_until[alias] = now + check
+    return True
+
+
+def choose_replica():
+    """
+    Picks the next healthy replica in round-robin order.
+
+    Returns:
+        alias(string): The replica alias, or None if no replica is healthy.
+    """
+    replicas = getattr(settings, 'JUSCMS_READ_REPLICAS', [])
+    if not replicas:
+        return None
+    start = next(replica_counter)
+    for i in range(len(replicas)):
+        alias = replicas[(start + i) % len(replicas)]
+        if is_healthy(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter(object):
+    """
+    Database router that sends reads made while serving public pages to the
+    aliases listed in 'JUSCMS_READ_REPLICAS' and everything else to the
+    'default' database. Which requests may use replicas is decided by
+    jusutils.middleware.ReplicaMiddleware. Replicas are expected to be kept
+    in sync by the database itself, so nothing is migrated on them.
+    """
+    def db_for_read(self, model, **hints):
+        if getattr(state, 'use_replicas', False):
+            return choose_replica() or 'default'
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'JUSCMS_READ_REPLICAS', [])
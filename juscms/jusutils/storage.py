@@ -0,0 +1,18 @@
+from django.contrib.staticfiles import storage
+
+
+class ManifestStaticFilesStorage(storage.ManifestStaticFilesStorage):
+    """
+    Stores static files under names containing a hash of their content, as
+    listed in the manifest written by collectstatic, so they can be cached
+    forever; see jusutils.middleware.ImmutableAssetsMiddleware.
+
+    Unlike Django's storage, files missing from the manifest, e.g. before
+    collectstatic has run or in tests, are referenced under their unhashed
+    name instead of raising an error while a page is rendered.
+    """
+    def stored_name(self, name):
+        try:
+            return super(ManifestStaticFilesStorage, self).stored_name(name)
+        except ValueError:
+            return name
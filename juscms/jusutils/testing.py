@@ -0,0 +1,95 @@
+import contextlib
+import functools
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudget(object):
+    """
+    Asserts that a block of code runs at most 'limit' database queries. Unlike
+    Django's assertNumQueries it sets an upper bound, so tests do not break
+    when a change saves a query, only when one adds queries.
+
+    Can be used as a context manager or as a decorator:
+
+        with QueryBudget(3):
+            client.get('/about/')
+
+        @QueryBudget(3)
+        def test_about_page(self):
+            ...
+
+    Attributes:
+        limit(integer): The maximum number of queries allowed.
+        using(string): The database alias whose queries are counted.
+        captured(list): The queries run inside the block, once it has exited.
+    """
+    def __init__(self, limit, using='default'):
+        self.limit = limit
+        self.using = using
+        self.captured = []
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        self.captured = self.context.captured_queries
+        if exc_type is not None:
+            return
+        if len(self.captured) > self.limit:
+            raise AssertionError(
+                '%d queries executed, the budget is %d\nCaptured queries:\n%s'
+                % (
+                    len(self.captured),
+                    self.limit,
+                    '\n'.join(
+                        '%d. %s' % (i, query['sql'])
+                        for i, query in enumerate(self.captured, start=1)
+                    ),
+                )
+            )
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with QueryBudget(self.limit, self.using):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class QueryBudgetMixin(object):
+    """
+    TestCase mixin providing assertQueryBudget, which mirrors
+    assertNumQueries but with an upper bound.
+    """
+    def assertQueryBudget(self, limit, func=None, *args, **kwargs):
+        using = kwargs.pop('using', 'default')
+        budget = QueryBudget(limit, using)
+        if func is None:
+            return budget
+        with budget:
+            func(*args, **kwargs)
+
+
+@contextlib.contextmanager
+def run_on_commit(using='default'):
+    """
+    Runs the transaction.on_commit callbacks registered inside the block when
+    it exits, as if its changes had been committed. TestCase runs every test
+    in a transaction that is rolled back, so the callbacks never run
+    otherwise:
+
+        with run_on_commit():
+            page.save()
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for savepoint_ids, func in callbacks:
+        func()
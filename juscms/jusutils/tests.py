@@ -1 +1,242 @@
-from django.test import TestCase
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.db import connection
+from django.http import HttpResponse
+
+from pages import tree
+from pages.models import Page, Row, Chunk
+
+from . import routers
+from .fields import RAW, ZLIB
+from .middleware import (
+    ImmutableAssetsMiddleware,
+    ReplicaMiddleware,
+    PIN_COOKIE,
+)
+from .minify import HTMLMinifier, minify_html
+from .testing import QueryBudget, QueryBudgetMixin
+
+
+@override_settings(JUSCMS_READ_REPLICAS=['replica'])
+class ReplicaRouterTest(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware()
+        self.router = routers.ReplicaRouter()
+
+    def tearDown(self):
+        routers.end_request()
+
+    def test_public_get_uses_replicas(self):
+
+        self.middleware.process_request(self.factory.get('/about/'))
+
+        self.assertTrue(routers.state.use_replicas)
+        self.assertEqual(self.router.db_for_read(Page), 'replica')
+        self.assertEqual(Page.objects.all().db, 'replica')
+
+    def test_write_sends_later_reads_to_primary(self):
+
+        self.middleware.process_request(self.factory.get('/about/'))
+        self.assertEqual(self.router.db_for_read(Page), 'replica')
+
+        Page(title='Written Page').save()
+
+        self.assertEqual(self.router.db_for_read(Page), 'default')
+
+    def test_bulk_path_update_sends_later_reads_to_primary(self):
+
+        page = Page.objects.create(title='Bulk Page')
+        self.middleware.process_request(self.factory.get('/bulk-page/'))
+
+        tree.update_paths(page)
+
+        self.assertTrue(routers.state.wrote)
+        self.assertEqual(self.router.db_for_read(Page), 'default')
+
+    def test_admin_and_post_use_primary(self):
+
+        self.middleware.process_request(self.factory.get('/admin/'))
+        self.assertFalse(routers.state.use_replicas)
+
+        self.middleware.process_request(self.factory.post('/about/'))
+        self.assertFalse(routers.state.use_replicas)
+
+    def test_write_pins_client_to_primary(self):
+
+        request = self.factory.post('/admin/pages/page/add/')
+        self.middleware.process_request(request)
+        Page(title='Pinned Page').save()
+        response = self.middleware.process_response(request, HttpResponse())
+
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = self.factory.get('/pinned-page/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.middleware.process_request(request)
+
+        self.assertEqual(self.router.db_for_read(Page), 'default')
+        self.assertFalse(routers.state.use_replicas)
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+
+    def test_budget_allows_fewer_queries(self):
+
+        with self.assertQueryBudget(2):
+            Page.objects.count()
+
+    def test_budget_fails_when_exceeded(self):
+
+        with self.assertRaises(AssertionError):
+            with QueryBudget(1):
+                Page.objects.count()
+                Page.objects.count()
+
+
+class ImmutableAssetsTest(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = ImmutableAssetsMiddleware()
+
+    def cache_control(self, path):
+        response = self.middleware.process_response(
+            self.factory.get(path),
+            HttpResponse(),
+        )
+        return response.get('Cache-Control', '')
+
+    def test_hashed_assets_are_immutable(self):
+
+        self.assertIn(
+            'immutable',
+            self.cache_control('/static/css/main.d41d8cd98f00.css'),
+        )
+        self.assertIn(
+            'immutable',
+            self.cache_control(
+                '/media/media/variants/0123456789abcdef0123.webp',
+            ),
+        )
+
+    def test_unhashed_assets_and_pages_are_not(self):
+
+        self.assertEqual(self.cache_control('/static/css/main.css'), '')
+        self.assertEqual(self.cache_control('/about/'), '')
+
+
+class CompressedTextFieldTest(TestCase):
+
+    def stored(self, chunk):
+        cursor = connection.cursor()
+        cursor.execute(
+            'SELECT content FROM pages_chunk WHERE id = %s',
+            [chunk.id],
+        )
+        return bytes(cursor.fetchone()[0])
+
+    @override_settings(JUSCMS_COMPRESS_THRESHOLD=100)
+    def test_large_content_is_compressed(self):
+
+        Page(title='Compressed').save()
+        row = Row.objects.create(parent=Page.objects.get())
+        large = Chunk.objects.create(parent=row, content='<p>x</p>' * 100)
+        small = Chunk.objects.create(parent=row, content='<p>x</p>')
+
+        self.assertEqual(self.stored(large)[:1], ZLIB)
+        self.assertEqual(self.stored(small), RAW + b'<p>x</p>')
+        self.assertEqual(
+            list(row.chunks.order_by('id').values_list('content', flat=True)),
+            ['<p>x</p>' * 100, '<p>x</p>'],
+        )
+        self.assertEqual(
+            Chunk.objects.get(content='<p>x</p>' * 100).id,
+            large.id,
+        )
+
+
+class MinifyTest(TestCase):
+
+    html = (
+        '\n<div   class="row" >\n    <!-- note -->\n    <p>a   b</p>\n'
+        '<pre>  keep\n  this</pre>\n<script>if (a < b) {  }</script>\n'
+        '<textarea>  x\n</textarea><!--juscms:fragment:footer-->\n</div>'
+    )
+
+    def test_whitespace_is_collapsed_outside_raw_elements(self):
+
+        self.assertEqual(
+            minify_html(self.html),
+            '<div class="row"> <p>a b</p> <pre>  keep\n  this</pre> '
+            '<script>if (a < b) {  }</script> <textarea>  x\n</textarea>'
+            '<!--juscms:fragment:footer--> </div>',
+        )
+
+    def test_streaming_matches_whole_document(self):
+
+        for size in (1, 2, 3, 7):
+            minifier = HTMLMinifier()
+            output = [
+                minifier.feed(self.html[i:i + size])
+                for i in range(0, len(self.html), size)
+            ]
+            output.append(minifier.close())
+            self.assertEqual(''.join(output), minify_html(self.html))
+
+
+@override_settings(ROOT_URLCONF='config.urls_frontend')
+class FrontendModeTest(TestCase):
+
+    def test_frontend_urlconf_serves_pages_only(self):
+
+        Page(title='Frontend Page').save()
+
+        client = Client()
+
+        self.assertEqual(client.get('/frontend-page/').status_code, 200)
+        self.assertEqual(client.get('/admin/').status_code, 404)
+
+    def test_frontend_settings_serve_pages(self):
+
+        from config import settings, settings_frontend
+
+        self.assertIn(
+            'django.contrib.auth.context_processors.auth',
+            settings.TEMPLATES[0]['OPTIONS']['context_processors'],
+        )
+
+        Page(title='Frontend Settings Page').save()
+        frontend = dict(
+            (name, getattr(settings_frontend, name)) for name in (
+                'INSTALLED_APPS',
+                'MIDDLEWARE_CLASSES',
+                'ROOT_URLCONF',
+                'TEMPLATES',
+            )
+        )
+
+        with self.settings(**frontend):
+            client = Client()
+            response = client.get('/frontend-settings-page/')
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(client.get('/admin/').status_code, 404)
+
+    def test_frontend_settings_require_a_shared_page_cache(self):
+
+        from pages.checks import check_shared_page_cache
+
+        self.assertEqual(check_shared_page_cache(None), [])
+        with self.settings(JUSCMS_FRONTEND_ONLY=True):
+            errors = check_shared_page_cache(None)
+        self.assertEqual([error.id for error in errors], ['pages.E001'])
+
+        with self.settings(
+            JUSCMS_FRONTEND_ONLY=True,
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': 'juscms_cache',
+            }},
+        ):
+            self.assertEqual(check_shared_page_cache(None), [])
@@ -1,19 +1,19 @@
 from django.contrib import admin
 
-from jusutils.mixins import SingleInstanceAdminMixin
-
 from .models import Header, Footer
 
 
 @admin.register(Header)
-class HeaderAdmin(admin.ModelAdmin, SingleInstanceAdminMixin):
+class HeaderAdmin(admin.ModelAdmin):
+    list_display = ('name', 'site')
     prepopulated_fields = {
         'slug': ('name',),
     }
 
 
 @admin.register(Footer)
-class FooterAdmin(SingleInstanceAdminMixin, admin.ModelAdmin):
+class FooterAdmin(admin.ModelAdmin):
+    list_display = ('name', 'site')
     prepopulated_fields = {
         'slug': ('name',),
     }
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class LayoutConfig(AppConfig):
     name = 'layout'
+
+    def ready(self):
+        from . import fragments  # noqa: registers the Header and Footer
@@ -0,0 +1,31 @@
+from django.template.loader import render_to_string
+
+from pages import cache
+
+from .models import Header, Footer
+
+
+def render_header(site_id):
+    """
+    Renders the Header of a site into the fragment stitched into every page
+    of the site.
+    """
+    content = render_to_string('header.html', {
+        'header': Header.objects.filter(site_id=site_id).first(),
+    })
+    return content.encode('utf-8')
+
+
+def render_footer(site_id):
+    """
+    Renders the Footer of a site into the fragment stitched into every page
+    of the site.
+    """
+    content = render_to_string('footer.html', {
+        'footer': Footer.objects.filter(site_id=site_id).first(),
+    })
+    return content.encode('utf-8')
+
+
+cache.register_fragment('header', render_header)
+cache.register_fragment('footer', render_footer)
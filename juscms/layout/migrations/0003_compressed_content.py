@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+import jusutils.fields
+
+
+def compress_content(apps, schema_editor):
+    from jusutils.fields import copy_field
+    for model_name in ('Header', 'Footer'):
+        copy_field(
+            apps.get_model('layout', model_name),
+            'content',
+            'content_compressed',
+        )
+
+
+def decompress_content(apps, schema_editor):
+    from jusutils.fields import copy_field
+    for model_name in ('Header', 'Footer'):
+        copy_field(
+            apps.get_model('layout', model_name),
+            'content_compressed',
+            'content',
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('layout', '0002_auto_20160305_0539'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='header',
+            name='content_compressed',
+            field=jusutils.fields.CompressedTextField(blank=True, default='', verbose_name='HTML Content'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='footer',
+            name='content_compressed',
+            field=jusutils.fields.CompressedTextField(blank=True, default='', verbose_name='HTML Content'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(compress_content, decompress_content),
+        migrations.RemoveField(
+            model_name='header',
+            name='content',
+        ),
+        migrations.RemoveField(
+            model_name='footer',
+            name='content',
+        ),
+        migrations.RenameField(
+            model_name='header',
+            old_name='content_compressed',
+            new_name='content',
+        ),
+        migrations.RenameField(
+            model_name='footer',
+            old_name='content_compressed',
+            new_name='content',
+        ),
+    ]
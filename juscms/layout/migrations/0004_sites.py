@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import pages.sites
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sites', '0002_alter_domain_unique'),
+        ('layout', '0003_compressed_content'),
+        ('pages', '0013_sites'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='footer',
+            name='site',
+            field=models.OneToOneField(default=pages.sites.default_site_id, on_delete=django.db.models.deletion.CASCADE, related_name='footer', to='sites.Site', verbose_name='Site'),
+        ),
+        migrations.AddField(
+            model_name='header',
+            name='site',
+            field=models.OneToOneField(default=pages.sites.default_site_id, on_delete=django.db.models.deletion.CASCADE, related_name='header', to='sites.Site', verbose_name='Site'),
+        ),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from django.contrib.sites.models import Site
+from django.db import models, transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
 from django.template.defaultfilters import slugify
 
-from jusutils.mixins import SingleInstanceMixin
+from jusutils.fields import CompressedTextField
+from pages import cache, sites
 
 
 class AbstractLayout(models.Model):
@@ -12,6 +16,8 @@ class AbstractLayout(models.Model):
     Inherits From: Django's base model class.
 
     Attributes:
+        site(object): The Site the layout object is rendered on. Each site
+            has at most one instance of each layout model.
         name(string): Display name.
         slug(string): Slug generated from 'name'. Used for reference.
         html_ids(string): HTML ID as rendered in the html template for a
@@ -19,6 +25,12 @@ class AbstractLayout(models.Model):
         html_class(string): HTML Class as used in the html template for this
             layout object instance.
     """
+    site = models.OneToOneField(
+        Site,
+        verbose_name='Site',
+        related_name='%(class)s',
+        default=sites.default_site_id,
+    )
     name = models.CharField(
         verbose_name='Header Name',
         blank=False,
@@ -51,16 +63,17 @@ class AbstractLayout(models.Model):
         """
         if not self.slug:
             self.slug = slugify(self.name)
+        super(AbstractLayout, self).save(*args, **kwargs)
 
 
-class Header(SingleInstanceMixin, AbstractLayout):
+class Header(AbstractLayout):
     """
     This model is used to manage the HTML header as rendered in the template.
 
     Attributes:
         content(string): HTML Content for the header section.
     """
-    content = models.TextField(
+    content = CompressedTextField(
         verbose_name='HTML Content',
         blank=True,
     )
@@ -73,14 +86,14 @@ class Header(SingleInstanceMixin, AbstractLayout):
         return self.name
 
 
-class Footer(SingleInstanceMixin, AbstractLayout):
+class Footer(AbstractLayout):
     """
     This model is used to manage the HTML footer as rendered in the template.
 
     Attributes:
         content(string): HTML content to be rendered as the footer.
     """
-    content = models.TextField(
+    content = CompressedTextField(
         verbose_name='HTML Content',
         blank=True,
     )
@@ -91,3 +104,32 @@ class Footer(SingleInstanceMixin, AbstractLayout):
 
     def __str__(self):
         return self.name
+
+
+@receiver(post_save, sender=Header)
+@receiver(post_delete, sender=Header)
+def invalidate_header(sender, instance, using, **kwargs):
+    """
+    Removes the Header fragment of the Header's site from the cache once the
+    change is committed. Cached pages keep their bodies and are stitched
+    with the new Header on their next request.
+    """
+    site_id = instance.site_id
+    transaction.on_commit(
+        lambda: cache.invalidate_fragment('header', site_id),
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Footer)
+@receiver(post_delete, sender=Footer)
+def invalidate_footer(sender, instance, using, **kwargs):
+    """
+    Removes the Footer fragment of the Footer's site from the cache once the
+    change is committed.
+    """
+    site_id = instance.site_id
+    transaction.on_commit(
+        lambda: cache.invalidate_fragment('footer', site_id),
+        using=using,
+    )
@@ -1,14 +1,11 @@
 from django import template
 
-from layout.models import Footer
+from pages import cache
 
 
 register = template.Library()
 
 
-@register.inclusion_tag('footer.html')
-def render_footer():
-    footer = Footer.objects.all()[:1]
-    return {
-        'footer': footer,
-    }
+@register.simple_tag(takes_context=True)
+def render_footer(context):
+    return cache.fragment_tag(context, 'footer')
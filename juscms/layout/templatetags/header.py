@@ -1,14 +1,11 @@
 from django import template
 
-from layout.models import Header
+from pages import cache
 
 
 register = template.Library()
 
 
-@register.inclusion_tag('header.html')
-def render_header():
-    header = Header.objects.all()[:1]
-    return {
-        'header': header,
-    }
\ No newline at end of file
+@register.simple_tag(takes_context=True)
+def render_header(context):
+    return cache.fragment_tag(context, 'header')
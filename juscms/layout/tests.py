@@ -1,3 +1,50 @@
-from django.test import TestCase
+from django.contrib.sites.models import Site
+from django.test import TestCase, Client
 
-# Create your tests here.
+from jusutils.testing import run_on_commit
+from pages import cache
+from pages.models import Page
+
+from .models import Footer
+
+
+class FooterFragmentTest(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        Page(title='Test Page').save()
+        self.page = Page.objects.get(title='Test Page')
+
+    def test_footer_change_keeps_page_body_cached(self):
+
+        client = Client()
+        client.get('/' + self.page.path)
+
+        footer = Footer(name='Footer', content='<p>New footer</p>')
+        with run_on_commit():
+            footer.save()
+
+        self.assertIsNotNone(
+            cache.get_cache().get(cache.make_key('page', self.page.path))
+        )
+        response = client.get('/' + self.page.path)
+        self.assertContains(response, '<p>New footer</p>')
+
+    def test_footer_is_rendered_per_site(self):
+
+        with run_on_commit():
+            site = Site.objects.create(domain='other.example', name='Other')
+        Footer.objects.create(name='Footer', content='<p>Main footer</p>')
+        Footer.objects.create(
+            name='Footer',
+            content='<p>Other footer</p>',
+            site=site,
+        )
+        Page(title='Test Page', site=site).save()
+
+        client = Client()
+        main = client.get('/' + self.page.path)
+        other = client.get('/' + self.page.path, HTTP_HOST='other.example')
+
+        self.assertContains(main, '<p>Main footer</p>')
+        self.assertContains(other, '<p>Other footer</p>')
@@ -0,0 +1,46 @@
+from django.contrib import admin
+
+from .models import MediaFile, MediaVariant
+
+
+class MediaVariantInline(admin.TabularInline):
+    """
+    Read-only list of the variants generated for a media file. Variants are
+    created by the background workers and cannot be edited by hand.
+    """
+    model = MediaVariant
+    fields = (
+        'format',
+        'width',
+        'height',
+        'file',
+    )
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(MediaFile)
+class MediaFileAdmin(admin.ModelAdmin):
+    """
+    Class that registers the MediaFile model in the django admin interface.
+    Saving an upload returns immediately; variants appear once the
+    background workers have generated them.
+    """
+    list_display = (
+        'title',
+        'width',
+        'height',
+        'processed',
+        'uploaded',
+    )
+    search_fields = (
+        'title',
+        'alt_text',
+    )
+    inlines = [
+        MediaVariantInline,
+    ]
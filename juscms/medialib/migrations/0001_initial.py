@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.1 on 2026-10-19 10:03
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import medialib.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Title')),
+                ('file', models.ImageField(height_field='height', max_length=300, upload_to=medialib.models.hashed_upload_to, verbose_name='Image', width_field='width')),
+                ('alt_text', models.CharField(blank=True, max_length=300, verbose_name='Alternative Text')),
+                ('width', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Width')),
+                ('height', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Height')),
+                ('processed', models.BooleanField(default=False, editable=False, verbose_name='Variants Generated')),
+                ('uploaded', models.DateTimeField(auto_now_add=True, verbose_name='Uploaded')),
+            ],
+            options={
+                'verbose_name': 'Media File',
+                'verbose_name_plural': 'Media Files',
+            },
+        ),
+        migrations.CreateModel(
+            name='MediaVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('width', models.PositiveIntegerField(verbose_name='Width')),
+                ('height', models.PositiveIntegerField(verbose_name='Height')),
+                ('format', models.CharField(max_length=10, verbose_name='Format')),
+                ('file', models.FileField(max_length=300, upload_to='', verbose_name='File')),
+                ('media', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='medialib.MediaFile', verbose_name='Media File')),
+            ],
+            options={
+                'verbose_name': 'Media Variant',
+                'verbose_name_plural': 'Media Variants',
+                'ordering': ['format', 'width'],
+            },
+        ),
+    ]
@@ -0,0 +1,163 @@
+import hashlib
+import os
+
+from django.db import models, transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+
+
+def hashed_upload_to(instance, filename):
+    """
+    Names uploaded originals after a hash of their content, so a file's URL
+    changes whenever its content does. Uploading the same content again
+    stores another copy, which the storage gives a suffixed name.
+    """
+    digest = hashlib.sha1()
+    for chunk in instance.file.chunks():
+        digest.update(chunk)
+    extension = os.path.splitext(filename)[1].lower()
+    return 'media/originals/%s%s' % (digest.hexdigest()[:20], extension)
+
+
+class MediaFile(models.Model):
+    """
+    An image uploaded through the admin. Resized variants are generated by
+    the task queue workers after the upload is saved, see
+    medialib.processing.
+
+    Attributes:
+        title(string): Display name used in the admin.
+        file(file): The original uploaded image.
+        alt_text(string): Alternative text rendered with the image.
+        width(integer): Width of the original image in pixels.
+        height(integer): Height of the original image in pixels.
+        processed(boolean): Whether the variants for the current file have
+            been generated.
+        uploaded(datetime): When the media file was created.
+    """
+    title = models.CharField(
+        verbose_name='Title',
+        blank=False,
+        max_length=200,
+    )
+    file = models.ImageField(
+        verbose_name='Image',
+        upload_to=hashed_upload_to,
+        width_field='width',
+        height_field='height',
+        max_length=300,
+    )
+    alt_text = models.CharField(
+        verbose_name='Alternative Text',
+        blank=True,
+        max_length=300,
+    )
+    width = models.PositiveIntegerField(
+        verbose_name='Width',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    height = models.PositiveIntegerField(
+        verbose_name='Height',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    processed = models.BooleanField(
+        verbose_name='Variants Generated',
+        default=False,
+        editable=False,
+    )
+    uploaded = models.DateTimeField(
+        verbose_name='Uploaded',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Media File'
+        verbose_name_plural = 'Media Files'
+
+    def __init__(self, *args, **kwargs):
+        super(MediaFile, self).__init__(*args, **kwargs)
+        self._original_file = self.file.name
+
+    def save(self, *args, **kwargs):
+        """
+        Marks the media file as unprocessed whenever a new file is uploaded.
+        """
+        if self.file.name != self._original_file:
+            self.processed = False
+        super(MediaFile, self).save(*args, **kwargs)
+        self._original_file = self.file.name
+
+    def __str__(self):
+        return self.title
+
+
+class MediaVariant(models.Model):
+    """
+    A resized and re-encoded copy of a MediaFile.
+
+    Attributes:
+        media(object): The MediaFile this variant was generated from.
+        width(integer): Width of the variant in pixels.
+        height(integer): Height of the variant in pixels.
+        format(string): Image format of the variant, e.g. 'JPEG' or 'WEBP'.
+        file(file): The variant image, named after a hash of its content.
+    """
+    media = models.ForeignKey(
+        MediaFile,
+        verbose_name='Media File',
+        related_name='variants',
+    )
+    width = models.PositiveIntegerField(
+        verbose_name='Width',
+    )
+    height = models.PositiveIntegerField(
+        verbose_name='Height',
+    )
+    format = models.CharField(
+        verbose_name='Format',
+        max_length=10,
+    )
+    file = models.FileField(
+        verbose_name='File',
+        max_length=300,
+    )
+
+    class Meta:
+        verbose_name = 'Media Variant'
+        verbose_name_plural = 'Media Variants'
+        ordering = ['format', 'width']
+
+    def __str__(self):
+        return '%s %dw %s' % (self.media, self.width, self.format)
+
+
+@receiver(post_save, sender=MediaFile)
+def queue_variants(sender, instance, **kwargs):
+    """
+    Queues variant generation for a media file on the background task queue,
+    so the admin save request does not wait for it.
+    """
+    if not instance.processed:
+        from .tasks import generate_variants
+        generate_variants.delay(instance.id)
+
+
+@receiver(post_delete, sender=MediaVariant)
+def delete_variant_file(sender, instance, using, **kwargs):
+    """
+    Deletes the file of a deleted variant from storage once the deletion is
+    committed. Variant files are named after their content, so the file is
+    kept if another variant uses it, such as the one that replaced it when
+    the variants were generated again.
+    """
+    name = instance.file.name
+    storage = instance.file.storage
+
+    def delete():
+        if not MediaVariant.objects.filter(file=name).exists():
+            storage.delete(name)
+    transaction.on_commit(delete, using=using)
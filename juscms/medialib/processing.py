@@ -0,0 +1,131 @@
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from PIL import Image
+
+from jusutils import routers
+
+from .models import MediaFile, MediaVariant
+
+
+FORMATS = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'PNG': ('png', 'image/png'),
+    'GIF': ('gif', 'image/gif'),
+    'WEBP': ('webp', 'image/webp'),
+}
+
+
+def webp_supported():
+    """
+    Checks whether the installed Pillow can encode WebP images.
+    """
+    Image.init()
+    return 'WEBP' in Image.SAVE
+
+
+def convert_mode(image, image_format):
+    """
+    Converts an image to a mode the output format can encode. JPEG takes
+    RGB or greyscale. WebP only takes RGB and RGBA, so images with an alpha
+    channel or a transparent palette color keep their transparency as RGBA
+    and every other mode, like palette or greyscale images, becomes RGB.
+    """
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        return image.convert('RGB')
+    if image_format == 'WEBP':
+        transparent = (
+            image.mode in ('RGBA', 'LA', 'PA') or
+            'transparency' in image.info
+        )
+        mode = 'RGBA' if transparent else 'RGB'
+        if image.mode != mode:
+            return image.convert(mode)
+    return image
+
+
+def encode(image, image_format):
+    """
+    Encodes an image and stores it under a name derived from its content. An
+    existing file with the same content is reused.
+
+    Returns:
+        name(string): The storage name of the encoded image.
+    """
+    buffer = io.BytesIO()
+    options = {}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = getattr(settings, 'JUSCMS_MEDIA_QUALITY', 82)
+    if image_format == 'JPEG':
+        options['optimize'] = True
+        options['progressive'] = True
+    image = convert_mode(image, image_format)
+    image.save(buffer, image_format, **options)
+    content = buffer.getvalue()
+    extension = FORMATS[image_format][0]
+    digest = hashlib.sha1(content).hexdigest()[:20]
+    name = 'media/variants/%s.%s' % (digest, extension)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def generate_variants(media_id):
+    """
+    Generates the resized variants of a MediaFile, one per width in
+    'JUSCMS_MEDIA_WIDTHS' that is narrower than the original, in the original
+    format and additionally as WebP when Pillow supports it. The original
+    width is always included so srcset has a full size candidate.
+    """
+    media = MediaFile.objects.get(id=media_id)
+    media.file.open('rb')
+    try:
+        image = Image.open(media.file)
+        image.load()
+    finally:
+        media.file.close()
+
+    source_format = image.format if image.format in FORMATS else 'PNG'
+    output_formats = [source_format]
+    if source_format != 'WEBP' and webp_supported():
+        output_formats.append('WEBP')
+
+    widths = [
+        width for width in getattr(
+            settings,
+            'JUSCMS_MEDIA_WIDTHS',
+            [320, 640, 960, 1280, 1920],
+        )
+        if width < image.width
+    ]
+    widths.append(image.width)
+
+    variants = []
+    for width in widths:
+        height = max(1, int(round(image.height * width / float(image.width))))
+        if width == image.width:
+            resized = image
+        else:
+            resized = image.resize((width, height), Image.LANCZOS)
+        for image_format in output_formats:
+            variants.append(MediaVariant(
+                media=media,
+                width=width,
+                height=height,
+                format=image_format,
+                file=encode(resized, image_format),
+            ))
+
+    routers.record_write()
+    with transaction.atomic():
+        media.variants.all().delete()
+        MediaVariant.objects.bulk_create(variants)
+        MediaFile.objects.filter(
+            id=media.id,
+            file=media.file.name,
+        ).update(processed=True)
@@ -0,0 +1,16 @@
+from taskqueue.queue import task
+
+from . import processing
+from .models import MediaFile
+
+
+@task
+def generate_variants(media_id):
+    """
+    Generates the variants of a MediaFile. Media deleted before the task ran
+    is skipped.
+    """
+    try:
+        processing.generate_variants(media_id)
+    except MediaFile.DoesNotExist:
+        pass
@@ -0,0 +1,46 @@
+from django import template
+
+from medialib.models import MediaFile
+from medialib.processing import FORMATS
+
+
+register = template.Library()
+
+
+@register.inclusion_tag('medialib/image.html')
+def responsive_image(media, sizes='100vw', css_class=''):
+    """
+    Renders a MediaFile as a picture element with srcset candidates from its
+    precomputed variants, so browsers download the smallest image that fits.
+    Accepts a MediaFile instance or its id. Until the variants exist the
+    original is rendered on its own.
+
+    Usage:
+        {% load medialib %}
+        {% responsive_image image sizes="(max-width: 600px) 100vw, 50vw" %}
+    """
+    if not isinstance(media, MediaFile):
+        media = MediaFile.objects.filter(id=media).first()
+    sources = []
+    fallback = ''
+    if media is not None:
+        variants = {}
+        for variant in media.variants.all():
+            variants.setdefault(variant.format, []).append(
+                '%s %dw' % (variant.file.url, variant.width)
+            )
+        for image_format, candidates in variants.items():
+            if image_format == 'WEBP':
+                sources.insert(0, {
+                    'type': FORMATS[image_format][1],
+                    'srcset': ', '.join(candidates),
+                })
+            else:
+                fallback = ', '.join(candidates)
+    return {
+        'media': media,
+        'sources': sources,
+        'srcset': fallback,
+        'sizes': sizes,
+        'css_class': css_class,
+    }
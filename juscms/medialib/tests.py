@@ -0,0 +1,123 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from PIL import Image
+
+from jusutils.testing import run_on_commit
+
+from .models import MediaFile
+from . import processing
+
+
+class VariantTest(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            JUSCMS_MEDIA_WIDTHS=[100, 200],
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_variants_are_generated(self):
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 150)).save(buffer, 'JPEG')
+        media = MediaFile(
+            title='Test Image',
+            file=SimpleUploadedFile('test.jpg', buffer.getvalue()),
+        )
+        media.save()
+
+        processing.generate_variants(media.id)
+
+        media = MediaFile.objects.get(id=media.id)
+        self.assertTrue(media.processed)
+        widths = media.variants.filter(format='JPEG').values_list(
+            'width',
+            flat=True,
+        )
+        self.assertEqual(list(widths), [100, 200, 300])
+
+    def test_replaced_variant_files_are_deleted(self):
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 150)).save(buffer, 'JPEG')
+        media = MediaFile(
+            title='Test Image',
+            file=SimpleUploadedFile('test.jpg', buffer.getvalue()),
+        )
+        media.save()
+        processing.generate_variants(media.id)
+        variants = os.path.join(self.media_root, 'media', 'variants')
+
+        with self.settings(JUSCMS_MEDIA_WIDTHS=[150]):
+            with run_on_commit():
+                processing.generate_variants(media.id)
+
+        self.assertEqual(
+            sorted(os.listdir(variants)),
+            sorted(
+                os.path.basename(name) for name in
+                media.variants.values_list('file', flat=True)
+            ),
+        )
+
+        with run_on_commit():
+            media.delete()
+        self.assertEqual(os.listdir(variants), [])
+
+    def test_webp_modes(self):
+
+        palette = Image.new('P', (10, 10))
+        palette.info['transparency'] = 0
+        greyscale = Image.new('L', (10, 10))
+
+        self.assertEqual(
+            processing.convert_mode(palette, 'WEBP').mode,
+            'RGBA',
+        )
+        self.assertEqual(
+            processing.convert_mode(Image.new('P', (10, 10)), 'WEBP').mode,
+            'RGB',
+        )
+        self.assertEqual(
+            processing.convert_mode(greyscale, 'WEBP').mode,
+            'RGB',
+        )
+        self.assertEqual(
+            processing.convert_mode(greyscale, 'JPEG').mode,
+            'L',
+        )
+
+    @unittest.skipUnless(processing.webp_supported(), 'Pillow lacks WebP')
+    def test_palette_and_greyscale_images_are_encoded_as_webp(self):
+
+        for name, image in (
+            ('palette.png', Image.new('P', (300, 150))),
+            ('greyscale.png', Image.new('L', (300, 150))),
+        ):
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG', transparency=0)
+            media = MediaFile(
+                title=name,
+                file=SimpleUploadedFile(name, buffer.getvalue()),
+            )
+            media.save()
+
+            processing.generate_variants(media.id)
+
+            self.assertEqual(
+                media.variants.filter(format='WEBP').count(),
+                3,
+            )
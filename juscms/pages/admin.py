@@ -1,8 +1,15 @@
+from django.conf.urls import url
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.views.decorators.http import require_POST
 
 import nested_admin
+from mptt.exceptions import InvalidMove
 
-from .models import Page, Row, Chunk
+from .models import Page, Row, Chunk, Redirect
+from .tree import move_page
 
 
 class ChunkInline(nested_admin.NestedStackedInline):
@@ -66,3 +73,73 @@ class PageAdmin(nested_admin.NestedAdmin):
     inlines = [
         RowInline,
     ]
+
+    def get_urls(self):
+        """
+        Adds the drag and drop tree view and the move endpoint it posts to.
+        """
+        urls = [
+            url(
+                r'^tree/$',
+                self.admin_site.admin_view(self.tree_view),
+                name='pages_page_tree',
+            ),
+            url(
+                r'^move/$',
+                self.admin_site.admin_view(require_POST(self.move_view)),
+                name='pages_page_move',
+            ),
+        ]
+        return urls + super(PageAdmin, self).get_urls()
+
+    def tree_view(self, request):
+        """
+        Renders every page in tree order so pages can be rearranged by drag
+        and drop.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='Page Tree',
+            pages=Page.objects.only('title', 'path', 'level'),
+        )
+        return render(request, 'admin/pages/page/tree.html', context)
+
+    def move_view(self, request):
+        """
+        Moves a page relative to a target page with tree.move_page. Expects
+        the 'page' and 'target' ids and a 'position' of 'first-child',
+        'last-child', 'left' or 'right'.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        position = request.POST.get('position')
+        if position not in ('first-child', 'last-child', 'left', 'right'):
+            return JsonResponse({'error': 'Invalid position.'}, status=400)
+        try:
+            page = Page.objects.get(id=request.POST.get('page'))
+            target = Page.objects.get(id=request.POST.get('target'))
+            page = move_page(page, target, position)
+        except (Page.DoesNotExist, ValueError):
+            return JsonResponse({'error': 'Page not found.'}, status=400)
+        except InvalidMove as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'id': page.id, 'path': page.path})
+
+
+@admin.register(Redirect)
+class RedirectAdmin(admin.ModelAdmin):
+    """
+    Lists the redirects created when pages change path. Redirects are created
+    automatically, but editors can remove ones that are no longer wanted.
+    """
+    list_display = (
+        'old_path',
+        'page',
+        'created',
+    )
+    search_fields = (
+        'old_path',
+    )
@@ -0,0 +1,218 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag, urlencode
+from django.views.generic import View
+
+from . import cache, sites
+from .models import Page
+from .render import PAGE_FIELDS, load_page
+
+
+DETAIL_FIELDS = PAGE_FIELDS + ('rows',)
+LIST_FIELDS = PAGE_FIELDS + ('parent_id', 'level')
+
+
+class APIError(Exception):
+    """
+    Raised by API views for invalid requests. Answered with a JSON error
+    object and the given status code.
+    """
+    def __init__(self, message, status=400):
+        super(APIError, self).__init__(message)
+        self.status = status
+
+
+def get_fields(request, allowed):
+    """
+    Returns the fields selected with the comma separated 'fields' query
+    parameter, or all allowed fields if it is missing.
+    """
+    fields = request.GET.get('fields')
+    if not fields:
+        return allowed
+    fields = tuple(field.strip() for field in fields.split(','))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise APIError('Unknown fields: %s' % ', '.join(unknown))
+    return fields
+
+
+def get_integer(request, name, default, minimum=1, maximum=None):
+    value = request.GET.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise APIError('%s must be an integer' % name)
+    if value < minimum or (maximum is not None and value > maximum):
+        raise APIError('%s is out of range' % name)
+    return value
+
+
+class APIView(View):
+    """
+    Base class of the read-only JSON API views. Serialized responses are
+    stored in the page cache, keyed by site and by the query parameters the
+    view uses, and retired with the site's HTML pages, see
+    pages.cache.invalidate_api. Every response has an ETag, so clients
+    revalidating an unchanged response get an empty 304 response, and may
+    be cached by clients for 'JUSCMS_API_MAX_AGE' seconds, 60 by default.
+
+    Attributes:
+        name(string): The endpoint name used in cache keys.
+        parameters(tuple): The query parameters that change the response.
+    """
+    name = None
+    parameters = ()
+
+    def get(self, request):
+        site_id = sites.get_site_id(request)
+        query = '%s?%s' % (self.name, urlencode(sorted(
+            (name, request.GET[name]) for name in self.parameters
+            if name in request.GET
+        )))
+        key = cache.api_key(query, site_id)
+        entry = cache.get_cache().get(key)
+        if entry is None:
+            try:
+                data = self.get_data(request, site_id)
+            except APIError as e:
+                return JsonResponse({'error': str(e)}, status=e.status)
+            content = json.dumps(
+                data,
+                cls=DjangoJSONEncoder,
+                separators=(',', ':'),
+            ).encode('utf-8')
+            entry = (content, hashlib.md5(content).hexdigest())
+            timeout = getattr(settings, 'JUSCMS_PAGE_CACHE_TIMEOUT', 60 * 60)
+            cache.get_cache().set(key, entry, timeout)
+
+        content, etag = entry
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = quote_etag(etag)
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=getattr(settings, 'JUSCMS_API_MAX_AGE', 60),
+        )
+        return get_conditional_response(request, etag, response=response)
+
+    def get_data(self, request, site_id):
+        """
+        Returns the data to serialize for a request. Raises APIError for
+        invalid requests.
+        """
+        raise NotImplementedError
+
+
+class PageAPIView(APIView):
+    """
+    Returns the Page instance with the 'path' query parameter, the home page
+    by default, with its rows and their chunks. The page is loaded into the
+    render objects from pages.render, with three queries whatever its size.
+    The 'fields' parameter selects the page fields to return, see
+    DETAIL_FIELDS.
+    """
+    name = 'page'
+    parameters = ('path', 'fields')
+
+    def get_data(self, request, site_id):
+        fields = get_fields(request, DETAIL_FIELDS)
+        page = load_page(path=request.GET.get('path', ''), site_id=site_id)
+        if page is None:
+            raise APIError('No Page matches the given query.', 404)
+        data = page._asdict()
+        data['rows'] = [
+            dict(
+                row._asdict(),
+                chunks=[chunk._asdict() for chunk in row.chunks],
+            )
+            for row in page.rows
+        ]
+        return dict((field, data[field]) for field in fields)
+
+
+class PageListAPIView(APIView):
+    """
+    Lists the pages below the page with the 'parent' query parameter, or
+    the root pages of the site without it, in tree order. The subtree is
+    selected with a single query on the MPTT 'lft' range of the parent.
+
+    Query parameters:
+        parent(string): The path of the parent page.
+        depth(integer): The number of levels below the parent to list, 1
+            for its children, the default. 'all' lists the whole subtree.
+        fields(string): The comma separated page fields to return, see
+            LIST_FIELDS.
+        limit(integer): The number of pages per response, at most
+            'JUSCMS_API_MAX_PAGE_SIZE', 200 by default.
+        cursor(string): The 'next' cursor of the previous response.
+
+    Pages are paginated with a cursor on their position in the tree rather
+    than an offset, so every page of results costs the same single query.
+    The response has the pages as 'results' and the URL of the next page
+    of results as 'next', which is null on the last page.
+    """
+    name = 'pages'
+    parameters = ('parent', 'depth', 'fields', 'limit', 'cursor')
+
+    def get_data(self, request, site_id):
+        fields = get_fields(request, LIST_FIELDS)
+        limit = get_integer(
+            request,
+            'limit',
+            getattr(settings, 'JUSCMS_API_PAGE_SIZE', 50),
+            maximum=getattr(settings, 'JUSCMS_API_MAX_PAGE_SIZE', 200),
+        )
+        depth = request.GET.get('depth')
+        if depth != 'all':
+            depth = get_integer(request, 'depth', 1)
+
+        pages = Page.objects.filter(site_id=site_id)
+        level = -1
+        parent = request.GET.get('parent')
+        if parent is not None:
+            parent = pages.filter(path=parent).values_list(
+                'tree_id', 'lft', 'rght', 'level',
+            ).first()
+            if parent is None:
+                raise APIError('No Page matches the given query.', 404)
+            tree_id, left, right, level = parent
+            pages = pages.filter(
+                tree_id=tree_id,
+                lft__gt=left,
+                lft__lt=right,
+            )
+        if depth != 'all':
+            pages = pages.filter(level__lte=level + depth)
+
+        cursor = request.GET.get('cursor')
+        if cursor:
+            try:
+                tree_id, left = [int(value) for value in cursor.split('.')]
+            except ValueError:
+                raise APIError('Invalid cursor')
+            pages = pages.filter(
+                Q(tree_id__gt=tree_id) | Q(tree_id=tree_id, lft__gt=left)
+            )
+
+        values = list(pages.order_by('tree_id', 'lft').values_list(
+            'tree_id', 'lft', *fields
+        )[:limit + 1])
+        next_url = None
+        if len(values) > limit:
+            values = values[:limit]
+            query = request.GET.copy()
+            query['cursor'] = '%d.%d' % values[-1][:2]
+            next_url = '%s?%s' % (request.path, query.urlencode())
+        return {
+            'results': [dict(zip(fields, page[2:])) for page in values],
+            'next': next_url,
+        }
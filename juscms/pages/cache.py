@@ -0,0 +1,403 @@
+import hashlib
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils.safestring import mark_safe
+
+from jusutils.minify import minify_html
+
+from . import sites
+
+
+# Markers carry a random token, different in every process, so comments in
+# editor content that look like markers are never taken for one. Markers
+# only exist between rendering a page and splitting it in render_page, so
+# the token does not need to be shared between processes.
+FRAGMENT_TOKEN = uuid.uuid4().hex
+FRAGMENT_MARKER = '<!--juscms:fragment:%s:%%s-->' % FRAGMENT_TOKEN
+FRAGMENT_RE = re.compile(r'<!--juscms:fragment:%s:(\w+)-->' % FRAGMENT_TOKEN)
+
+# Maps fragment names to functions returning the rendered fragment as bytes.
+FRAGMENTS = {}
+
+
+def get_cache():
+    """
+    Returns the cache backend used for rendered pages. The alias is set with
+    the 'JUSCMS_PAGE_CACHE' setting and defaults to the 'default' cache.
+    """
+    return caches[getattr(settings, 'JUSCMS_PAGE_CACHE', 'default')]
+
+
+def make_key(prefix, path, site_id=None):
+    """
+    Builds a cache key for a Page instance path on a site. Every site served
+    by the process shares the cache, so the Site id is part of the key. The
+    path is hashed because page paths can be longer than some cache backends
+    allow for keys.
+
+    Parameters:
+        prefix(string): The key namespace, e.g. 'page' or 'hits'.
+        path(string): The Page instance URL path.
+        site_id(integer): The Site id, the default site if None.
+
+    Returns:
+        key(string): The cache key.
+    """
+    if site_id is None:
+        site_id = sites.default_site_id()
+    key = '%s:%s' % (site_id, path)
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+    return 'juscms:%s:%s' % (prefix, digest)
+
+
+def register_fragment(name, renderer):
+    """
+    Registers a fragment that is shared by every page of a site, such as the
+    Header or Footer. Pages are cached with a marker in place of each
+    fragment and the fragments are cached separately for each site, so
+    changing a fragment only invalidates the fragment itself.
+
+    Parameters:
+        name(string): The fragment name used in markers and cache keys.
+        renderer(function): Called with a Site id, returns the rendered
+            fragment of that site as bytes.
+    """
+    FRAGMENTS[name] = renderer
+
+
+def get_fragment(name, site_id=None):
+    """
+    Returns the rendered content of a fragment for a site, rendering and
+    caching it on a cache miss.
+    """
+    key = make_key('fragment', name, site_id)
+    content = get_cache().get(key)
+    if content is None:
+        content = set_fragment(name, site_id)
+    return content
+
+
+def minify(content):
+    """
+    Minifies rendered HTML when 'JUSCMS_MINIFY_HTML' is enabled, see
+    jusutils.minify. Only applied when content is stored in the cache, so
+    cache hits are served without any extra work. Takes and returns either
+    text or UTF-8 encoded bytes, which are only decoded when minifying.
+    """
+    if not getattr(settings, 'JUSCMS_MINIFY_HTML', False):
+        return content
+    if isinstance(content, bytes):
+        return minify_html(content.decode('utf-8')).encode('utf-8')
+    return minify_html(content)
+
+
+def set_fragment(name, site_id=None):
+    """
+    Renders a fragment for a site and stores it in the page cache.
+    """
+    content = minify(FRAGMENTS[name](site_id or sites.default_site_id()))
+    timeout = getattr(settings, 'JUSCMS_PAGE_CACHE_TIMEOUT', 60 * 60)
+    get_cache().set(make_key('fragment', name, site_id), content, timeout)
+    return content
+
+
+def invalidate_fragment(name, site_id=None):
+    """
+    Removes a fragment of a site from the cache. Cached pages are left
+    untouched and pick up the new fragment the next time they are served.
+    """
+    get_cache().delete(make_key('fragment', name, site_id))
+
+
+def fragment_tag(context, name):
+    """
+    Implements the template tags of registered fragments. When a page is
+    being rendered for the page cache a marker is emitted so the fragment can
+    be stitched in at serve time, otherwise the cached fragment of the site
+    the request is for is inserted directly.
+    """
+    if context.get('juscms_fragments'):
+        return mark_safe(FRAGMENT_MARKER % name)
+    request = context.get('request')
+    site_id = sites.get_site_id(request) if request is not None else None
+    return mark_safe(get_fragment(name, site_id).decode('utf-8'))
+
+
+def render_page(instance, request=None):
+    """
+    Renders a Page instance, or its render objects from pages.render, with
+    its template into the form stored in the page cache: a tuple alternating
+    between rendered bytes and the names of the fragments that go between
+    them.
+    """
+    content = render_to_string(
+        instance.template,
+        {
+            'instance': instance,
+            'juscms_fragments': True,
+        },
+        request=request,
+    )
+    parts = FRAGMENT_RE.split(minify(content))
+    for i in range(0, len(parts), 2):
+        parts[i] = parts[i].encode('utf-8')
+    return tuple(parts)
+
+
+def stitch(parts, fragments=None, site_id=None):
+    """
+    Joins rendered page parts and their fragments into the response content.
+
+    Parameters:
+        parts(tuple): Page parts as returned by render_page.
+        fragments(dictionary): Already fetched fragment contents by name.
+            Missing fragments are fetched with get_fragment.
+        site_id(integer): The Site id the page belongs to.
+
+    Returns:
+        content(bytes): The complete HTML document.
+    """
+    fragments = fragments or {}
+    content = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            if part not in fragments:
+                fragments[part] = get_fragment(part, site_id)
+            part = fragments[part]
+        content.append(part)
+    return b''.join(content)
+
+
+def get_timeouts():
+    """
+    Returns the number of seconds a cached page is fresh and the number of
+    seconds it may be served stale afterwards while it is re-rendered.
+    """
+    fresh = getattr(settings, 'JUSCMS_PAGE_CACHE_TIMEOUT', 60 * 60)
+    stale = getattr(settings, 'JUSCMS_PAGE_CACHE_MAX_STALE', 60 * 60 * 24)
+    return fresh, stale
+
+
+def get_page(path, site_id=None):
+    """
+    Returns the cached content for a path on a site with the site's
+    fragments stitched in, or None on a cache miss. The page and all
+    fragments are fetched with a single cache call.
+
+    Returns:
+        (tuple): The stitched content and whether it is stale, or None.
+    """
+    page_key = make_key('page', path, site_id)
+    fragment_keys = dict(
+        (make_key('fragment', name, site_id), name) for name in FRAGMENTS
+    )
+    values = get_cache().get_many([page_key] + list(fragment_keys))
+    entry = values.pop(page_key, None)
+    if entry is None:
+        return None
+    parts, fresh_until = entry
+    fragments = dict(
+        (fragment_keys[key], value) for key, value in values.items()
+    )
+    return stitch(parts, fragments, site_id), time.time() > fresh_until
+
+
+def set_page(path, parts, site_id=None):
+    """
+    Stores rendered page parts in the page cache. The entry stays in the
+    cache for its fresh period plus the allowed staleness.
+    """
+    fresh, stale = get_timeouts()
+    entry = (parts, time.time() + fresh)
+    get_cache().set(make_key('page', path, site_id), entry, fresh + stale)
+
+
+def invalidate_page(*paths, site_id=None):
+    """
+    Marks the cached content for one or more paths of a site as stale. Stale
+    pages are still served for up to 'JUSCMS_PAGE_CACHE_MAX_STALE' seconds
+    while a single worker renders the new version.
+    """
+    fresh, stale = get_timeouts()
+    if not stale:
+        return delete_page(*paths, site_id=site_id)
+    cache = get_cache()
+    keys = [make_key('page', path, site_id) for path in paths]
+    entries = cache.get_many(keys)
+    cache.set_many(
+        dict((key, (entry[0], 0)) for key, entry in entries.items()),
+        stale,
+    )
+    invalidate_api(site_id)
+
+
+def delete_page(*paths, site_id=None):
+    """
+    Removes the cached content for one or more paths of a site. Used for
+    pages that no longer exist, which must not be served stale.
+    """
+    get_cache().delete_many([
+        make_key('page', path, site_id) for path in paths
+    ])
+    invalidate_api(site_id)
+
+
+def acquire_render_lock(path, site_id=None):
+    """
+    Tries to take the lock for rendering a path. The lock is a cache key
+    created with 'add', which is atomic in the cache backend, so it holds
+    across threads and, with a shared backend, across processes. It expires
+    by itself if its holder dies.
+
+    Returns:
+        (boolean): True if the lock was taken.
+    """
+    timeout = getattr(settings, 'JUSCMS_PAGE_RENDER_LOCK_TIMEOUT', 30)
+    return get_cache().add(make_key('lock', path, site_id), 1, timeout)
+
+
+def release_render_lock(path, site_id=None):
+    get_cache().delete(make_key('lock', path, site_id))
+
+
+def render_once(path, render, site_id=None):
+    """
+    Renders a path that is missing from the cache such that concurrent
+    requests for it only render it once. The request holding the lock renders
+    and caches the page while the others wait for the cache to be filled. If
+    the page is not cached within 'JUSCMS_PAGE_RENDER_WAIT' seconds, the
+    waiting request renders the page itself.
+
+    Parameters:
+        path(string): The Page instance URL path.
+        render(function): Called without arguments, returns the page parts
+            as returned by render_page. May raise Http404.
+        site_id(integer): The Site id the path belongs to.
+
+    Returns:
+        content(bytes): The stitched page content.
+    """
+    wait = getattr(settings, 'JUSCMS_PAGE_RENDER_WAIT', 5)
+    deadline = time.time() + wait
+    while True:
+        if acquire_render_lock(path, site_id):
+            try:
+                parts = render()
+                set_page(path, parts, site_id)
+                return stitch(parts, site_id=site_id)
+            finally:
+                release_render_lock(path, site_id)
+        if time.time() >= deadline:
+            return stitch(render(), site_id=site_id)
+        time.sleep(0.05)
+        entry = get_page(path, site_id)
+        if entry is not None:
+            return entry[0]
+
+
+def refresh_page(path, site_id=None):
+    """
+    Re-renders a stale path unless another worker is already doing so. The
+    page is rendered in a background thread unless
+    'JUSCMS_PAGE_REFRESH_IN_BACKGROUND' is disabled.
+    """
+    if not acquire_render_lock(path, site_id):
+        return
+    if getattr(settings, 'JUSCMS_PAGE_REFRESH_IN_BACKGROUND', True):
+        thread = threading.Thread(target=_refresh_page, args=(path, site_id))
+        thread.daemon = True
+        thread.start()
+    else:
+        _refresh_page(path, site_id, close_connection=False)
+
+
+def rerender_page(path, site_id=None):
+    """
+    Renders the current version of a path on a site into the page cache, or
+    removes the path from the cache if no Page instance of the site has it
+    any more.
+    """
+    from .render import load_page
+    if site_id is None:
+        site_id = sites.default_site_id()
+    instance = load_page(path=path, site_id=site_id)
+    if instance is None:
+        delete_page(path, site_id=site_id)
+    else:
+        request = RequestFactory().get('/' + path)
+        request.site_id = site_id
+        set_page(path, render_page(instance, request), site_id)
+
+
+def _refresh_page(path, site_id=None, close_connection=True):
+    try:
+        rerender_page(path, site_id)
+    finally:
+        release_render_lock(path, site_id)
+        if close_connection:
+            connection.close()
+
+
+def record_hit(path, site_id=None):
+    """
+    Counts a request for a path on a site so the cache warm-up command can
+    prioritize popular pages. Does nothing unless 'JUSCMS_RECORD_TRAFFIC' is
+    enabled.
+    """
+    if not getattr(settings, 'JUSCMS_RECORD_TRAFFIC', False):
+        return
+    cache = get_cache()
+    key = make_key('hits', path, site_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_hits(paths, site_id=None):
+    """
+    Returns a dictionary mapping each path of a site to its recorded number
+    of hits.
+    """
+    keys = dict((make_key('hits', path, site_id), path) for path in paths)
+    counts = get_cache().get_many(list(keys))
+    return dict((path, counts.get(key, 0)) for key, path in keys.items())
+
+
+def api_key(query, site_id=None):
+    """
+    Builds the cache key of a JSON API response, see pages.api. The key
+    includes the site's API version, so bumping the version with
+    invalidate_api retires every cached response of the site at once.
+
+    Parameters:
+        query(string): The endpoint and its normalized query parameters.
+        site_id(integer): The Site id the response belongs to.
+
+    Returns:
+        key(string): The cache key.
+    """
+    version = get_cache().get(make_key('api-version', '', site_id), 0)
+    return make_key('api', '%s:%s' % (version, query), site_id)
+
+
+def invalidate_api(site_id=None):
+    """
+    Invalidates every cached JSON API response of a site. Listings depend on
+    many pages, so any change to a page or its content invalidates them all.
+    Called whenever pages of the site are invalidated or deleted.
+    """
+    cache = get_cache()
+    key = make_key('api-version', '', site_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register('juscms')
+def check_shared_page_cache(app_configs, **kwargs):
+    """
+    Checks that the page cache is shared between processes when public pages
+    and the admin are served by separate workers, see
+    config.settings_frontend. The admin workers invalidate cached pages and
+    fragments and bump the routes version in the page cache, so with a
+    cache local to each process the frontend workers never see a change.
+    """
+    if not getattr(settings, 'JUSCMS_FRONTEND_ONLY', False):
+        return []
+    alias = getattr(settings, 'JUSCMS_PAGE_CACHE', 'default')
+    if not isinstance(caches[alias], (LocMemCache, DummyCache)):
+        return []
+    return [Error(
+        "The page cache '%s' is not shared with the admin workers." % alias,
+        hint="Point 'JUSCMS_PAGE_CACHE' at a cache backend shared between "
+             "processes, such as memcached or a database cache, in the "
+             "settings of both the admin and the frontend workers.",
+        id='pages.E001',
+    )]
@@ -0,0 +1,95 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from pages.models import Page, Row, Chunk
+from pages.render import load_page
+
+
+def build_table(rows, seed):
+    """
+    Builds an HTML table like the ones editors paste into chunks, with
+    varying cell values so it does not compress unrealistically well.
+    """
+    generator = random.Random(seed)
+    cells = ''.join(
+        '<tr><td class="name">Item %d</td><td>%d</td><td>%.2f</td>'
+        '<td>%s</td></tr>\n' % (
+            i,
+            generator.randint(1, 100000),
+            generator.random() * 1000,
+            generator.choice(['In stock', 'Sold out', 'Backorder']),
+        )
+        for i in range(rows)
+    )
+    return '<table class="prices">\n%s</table>' % cells
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the stored size and read time of chunk content with and '
+        'without compression.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunks',
+            type=int,
+            default=200,
+            help='Number of chunks on the synthetic page.',
+        )
+        parser.add_argument(
+            '--table-rows',
+            type=int,
+            default=200,
+            help='Table rows per chunk, about 70 bytes each.',
+        )
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write('%-12s %12s %12s %12s' % (
+            'Storage', 'Content KB', 'Stored KB', 'Read ms',
+        ))
+        # A threshold no value reaches stores every value uncompressed.
+        for name, threshold in (('raw', float('inf')), ('compressed', 1024)):
+            with override_settings(JUSCMS_COMPRESS_THRESHOLD=threshold):
+                with transaction.atomic():
+                    self.measure(name, options)
+                    transaction.set_rollback(True)
+
+    def measure(self, name, options):
+        page = Page(title='Content Benchmark')
+        page.save()
+        page = Page.objects.get(id=page.id)
+        row = Row.objects.create(parent=page)
+        Chunk.objects.bulk_create([
+            Chunk(parent=row, content=build_table(options['table_rows'], i))
+            for i in range(options['chunks'])
+        ])
+
+        content_size = sum(
+            len(content.encode('utf-8'))
+            for content in row.chunks.values_list('content', flat=True)
+        )
+        cursor = connection.cursor()
+        cursor.execute(
+            'SELECT SUM(LENGTH(content)) FROM %s WHERE parent_id = %%s'
+            % Chunk._meta.db_table,
+            [row.id],
+        )
+        stored_size = cursor.fetchone()[0]
+
+        started = time.perf_counter()
+        for i in range(options['iterations']):
+            load_page(id=page.id)
+        seconds = (time.perf_counter() - started) / options['iterations']
+
+        self.stdout.write('%-12s %12.1f %12.1f %12.2f' % (
+            name,
+            content_size / 1024.0,
+            stored_size / 1024.0,
+            seconds * 1000,
+        ))
@@ -0,0 +1,109 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from jusutils.minify import HTMLMinifier, minify_html
+from pages.render import PageData, RowData, ChunkData, RenderList
+
+
+def build_page(rows, chunks, content_size):
+    """
+    Builds render objects for a synthetic page without touching the
+    database.
+    """
+    content = '<p>%s</p>\n' % ' '.join(['lorem'] * (content_size // 6))
+    return PageData(
+        id=0,
+        title='Minify Benchmark',
+        path='minify-benchmark/',
+        seo_title='Minify Benchmark',
+        seo_description='',
+        template='page.html',
+        style_hash='',
+        rows=RenderList(
+            RowData(
+                id=i,
+                html_ids='',
+                html_class='row',
+                template='pages/row.html',
+                chunks=RenderList(
+                    ChunkData(
+                        id=j,
+                        html_ids='',
+                        html_class='chunk' if j % 2 else '',
+                        template='pages/chunk.html',
+                        content=content,
+                    )
+                    for j in range(chunks)
+                ),
+            )
+            for i in range(rows)
+        ),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the size reduction and throughput of the HTML minifier on '
+        'a large synthetic page.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument('--chunks', type=int, default=10)
+        parser.add_argument(
+            '--content-size',
+            type=int,
+            default=200,
+            help='Approximate bytes of text per chunk.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=8192,
+            help='Bytes fed to the streaming minifier at a time.',
+        )
+        parser.add_argument('--iterations', type=int, default=5)
+
+    def handle(self, *args, **options):
+        html = render_to_string('page.html', {
+            'instance': build_page(
+                options['rows'],
+                options['chunks'],
+                options['content_size'],
+            ),
+            'juscms_fragments': True,
+        })
+        minified = minify_html(html)
+        size = len(html.encode('utf-8'))
+        minified_size = len(minified.encode('utf-8'))
+        self.stdout.write('Original  %10d bytes' % size)
+        self.stdout.write('Minified  %10d bytes, %.1f%% smaller' % (
+            minified_size,
+            100.0 * (size - minified_size) / size,
+        ))
+
+        chunk_size = options['chunk_size']
+
+        def stream(html):
+            minifier = HTMLMinifier()
+            output = [
+                minifier.feed(html[i:i + chunk_size])
+                for i in range(0, len(html), chunk_size)
+            ]
+            output.append(minifier.close())
+            return ''.join(output)
+
+        for name, minify in (('Whole', minify_html), ('Streamed', stream)):
+            started = time.perf_counter()
+            for i in range(options['iterations']):
+                result = minify(html)
+            seconds = (time.perf_counter() - started) / options['iterations']
+            if result != minified:
+                self.stderr.write('%s output differs' % name)
+            self.stdout.write('%-9s %10.1f ms, %.1f MB/s' % (
+                name,
+                seconds * 1000,
+                size / seconds / 1000000,
+            ))
@@ -0,0 +1,106 @@
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from pages.models import Page, Row, Chunk
+from pages.render import load_page
+
+
+def load_models(path):
+    return Page.objects.prefetch_related('rows__chunks').get(path=path)
+
+
+def load_lean(path):
+    return load_page(path=path)
+
+
+def render(instance):
+    return render_to_string(instance.template, {
+        'instance': instance,
+        'juscms_fragments': True,
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares memory and time of rendering a page from full model '
+        'instances and from the lean render objects.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=None,
+            help='Path of an existing page to render. By default a synthetic '
+                 'page is created and rolled back afterwards.',
+        )
+        parser.add_argument('--rows', type=int, default=20)
+        parser.add_argument('--chunks', type=int, default=10)
+        parser.add_argument(
+            '--content-size',
+            type=int,
+            default=2000,
+            help='Bytes of HTML per chunk and of CSS on the synthetic page.',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Number of timed renders per mode.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            path = options['path']
+            if path is None:
+                path = self.build_page(options)
+            self.stdout.write('%-8s %12s %12s %12s' % (
+                'Mode', 'Held KB', 'Peak KB', 'Render ms',
+            ))
+            for name, load in (('models', load_models), ('lean', load_lean)):
+                self.measure(name, load, path, options['iterations'])
+            transaction.set_rollback(True)
+
+    def build_page(self, options):
+        page = Page(title='Render Benchmark', style='p{}' * (
+            options['content_size'] // 3
+        ))
+        page.save()
+        page = Page.objects.get(id=page.id)
+        content = '<p>%s</p>' % ('x' * options['content_size'])
+        for i in range(options['rows']):
+            row = Row.objects.create(parent=page, html_class='row')
+            Chunk.objects.bulk_create([
+                Chunk(parent=row, html_class='chunk', content=content)
+                for j in range(options['chunks'])
+            ])
+        return page.path
+
+    def measure(self, name, load, path, iterations):
+        """
+        Reports the memory still held by the loaded objects, the peak memory
+        of one load and render, and the mean time of a load and render.
+        """
+        render(load(path))
+        gc.collect()
+
+        tracemalloc.start()
+        instance = load(path)
+        held = tracemalloc.get_traced_memory()[0]
+        render(instance)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del instance
+
+        started = time.perf_counter()
+        for i in range(iterations):
+            render(load(path))
+        seconds = (time.perf_counter() - started) / iterations
+
+        self.stdout.write('%-8s %12.1f %12.1f %12.2f' % (
+            name, held / 1024.0, peak / 1024.0, seconds * 1000,
+        ))
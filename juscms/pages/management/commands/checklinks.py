@@ -0,0 +1,242 @@
+import functools
+import os
+import re
+import time
+from concurrent import futures
+from html import unescape
+from urllib.parse import unquote, urljoin, urlsplit
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand
+from django.core.urlresolvers import Resolver404, resolve
+from django.http.request import split_domain_port
+
+from layout.models import Header, Footer
+from pages.models import Page, Chunk, Redirect
+from pages.views import BaseView
+
+
+# Documents sent to a worker at a time.
+BATCH_SIZE = 500
+
+# The attributes of 'a' and 'area' start tags. Comments are matched too, so
+# that links commented out are skipped. A single regular expression pass is
+# several times faster than html.parser, which tokenizes every tag.
+LINK_TAG = re.compile(
+    r'<!--.*?-->|<(?:a|area)\s((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.IGNORECASE | re.DOTALL,
+)
+HREF = re.compile(
+    r'(?:^|\s)href\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))',
+    re.IGNORECASE,
+)
+
+
+def find_links(html):
+    """
+    Returns the link targets of the 'a' and 'area' elements in an HTML
+    document, with character references decoded.
+    """
+    links = []
+    for attributes in LINK_TAG.findall(html):
+        match = HREF.search(attributes)
+        if match is None:
+            continue
+        href = (match.group(1) or match.group(2) or match.group(3)).strip()
+        links.append(unescape(href) if '&' in href else href)
+    return links
+
+
+def normalize_host(host):
+    """
+    Returns a host in lower case without its port, a trailing dot or a
+    'www.' prefix, so every spelling of a site's domain compares equal.
+    """
+    domain = split_domain_port(host.lower())[0].rstrip('.')
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain
+
+
+# Sites link to the same pages from many documents, so resolved targets are
+# remembered.
+@functools.lru_cache(maxsize=65536)
+def internal_path(href, base, domain, ignore):
+    """
+    Resolves a link target against the URL of the document it appears in
+    and returns its path if it points into the same site, or None for
+    fragments, other schemes, other hosts and ignored path prefixes.
+    """
+    if not href or href.startswith('#'):
+        return None
+    parts = urlsplit(urljoin(base, href))
+    if parts.scheme not in ('', 'http', 'https'):
+        return None
+    if parts.netloc and normalize_host(parts.netloc) != domain:
+        return None
+    path = unquote(parts.path)
+    if any(path.startswith(prefix) for prefix in ignore):
+        return None
+    return path
+
+
+def extract_links(documents, domains, ignore):
+    """
+    Extracts the internal links of a batch of documents. Runs in a pool
+    worker and does not touch the database.
+
+    Parameters:
+        documents(list): Tuples of a source description, a Site id, the URL
+            path of the document and its HTML.
+        domains(dictionary): Maps Site ids to their domains, see
+            normalize_host.
+        ignore(tuple): Path prefixes that are not checked, such as
+            STATIC_URL.
+
+    Returns:
+        links(list): Tuples of the source, Site id, link target and its
+            path for every internal link.
+    """
+    links = []
+    for source, site_id, base, html in documents:
+        for href in find_links(html):
+            path = internal_path(href, base, domains.get(site_id), ignore)
+            if path is not None:
+                links.append((source, site_id, href, path))
+    return links
+
+
+class Command(BaseCommand):
+    help = (
+        'Checks the internal links in every chunk, header and footer '
+        'against the live page paths and reports broken links.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of processes parsing HTML. 1 parses in this '
+                 'process.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.time()
+        domains = dict(
+            (site_id, normalize_host(domain)) for site_id, domain in
+            Site.objects.values_list('id', 'domain')
+        )
+        self.live = set(Page.objects.values_list('site_id', 'path'))
+        self.redirects = dict(
+            ((site_id, old_path), path) for site_id, old_path, path in
+            Redirect.objects.values_list('site_id', 'old_path', 'page__path')
+        )
+        self.resolved = {}
+        self.broken = []
+        self.redirected = []
+        self.checked = 0
+        ignore = tuple(
+            prefix for prefix in (settings.STATIC_URL, settings.MEDIA_URL)
+            if prefix and prefix != '/'
+        )
+
+        batches = self.batches()
+        if options['workers'] > 1:
+            pool = futures.ProcessPoolExecutor(options['workers'])
+            with pool:
+                # Only a few batches are in flight at a time, so the content
+                # is streamed from the database instead of loaded at once.
+                pending = set()
+                for batch in batches:
+                    pending.add(
+                        pool.submit(extract_links, batch, domains, ignore)
+                    )
+                    if len(pending) >= options['workers'] * 2:
+                        done, pending = futures.wait(
+                            pending,
+                            return_when=futures.FIRST_COMPLETED,
+                        )
+                        for job in done:
+                            self.check_links(job.result())
+                for job in futures.as_completed(pending):
+                    self.check_links(job.result())
+        else:
+            for batch in batches:
+                self.check_links(extract_links(batch, domains, ignore))
+
+        for source, href, target in sorted(self.redirected):
+            self.stdout.write('%s: %s redirects to /%s' % (
+                source, href, target,
+            ))
+        for source, href in sorted(self.broken):
+            self.stdout.write('%s: %s is broken' % (source, href))
+        self.stdout.write(
+            'Checked %d links in %.1fs: %d broken, %d redirected' % (
+                self.checked,
+                time.time() - started,
+                len(self.broken),
+                len(self.redirected),
+            )
+        )
+
+    def batches(self):
+        """
+        Streams the HTML of every chunk, header and footer in batches of
+        BATCH_SIZE documents, see extract_links.
+        """
+        batch = []
+        chunks = Chunk.objects.values_list(
+            'id',
+            'parent__parent__site_id',
+            'parent__parent__path',
+            'content',
+        ).iterator()
+        for chunk_id, site_id, path, content in chunks:
+            source = '/%s chunk %d' % (path, chunk_id)
+            batch.append((source, site_id, '/' + path, content))
+            if len(batch) >= BATCH_SIZE:
+                yield batch
+                batch = []
+        for model in (Header, Footer):
+            name = model._meta.verbose_name
+            for site_id, content in model.objects.values_list(
+                'site_id',
+                'content',
+            ):
+                source = '%s of site %d' % (name, site_id)
+                batch.append((source, site_id, '/', content))
+        if batch:
+            yield batch
+
+    def check_links(self, links):
+        """
+        Checks extracted links against the live page paths and redirects.
+        Paths that are not pages but are routed to another view, such as
+        the API, are accepted.
+        """
+        for source, site_id, href, path in links:
+            self.checked += 1
+            page_path = path.lstrip('/')
+            if (site_id, page_path) in self.live:
+                continue
+            if not page_path.endswith('/') and (
+                (site_id, page_path + '/') in self.live
+            ):
+                continue
+            target = self.redirects.get((site_id, page_path))
+            if target is not None:
+                self.redirected.append((source, href, target))
+            elif not self.routed_elsewhere(path):
+                self.broken.append((source, href))
+
+    def routed_elsewhere(self, path):
+        if path not in self.resolved:
+            try:
+                view = resolve(path).func
+                elsewhere = getattr(view, 'view_class', None) is not BaseView
+            except Resolver404:
+                elsewhere = False
+            self.resolved[path] = elsewhere
+        return self.resolved[path]
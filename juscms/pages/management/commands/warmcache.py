@@ -0,0 +1,162 @@
+import threading
+import time
+from concurrent import futures
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+
+from pages import cache
+from pages.models import Page
+from pages.render import load_page
+
+
+class RateLimiter(object):
+    """
+    Spaces out calls across threads so that no more than 'rate' calls start
+    per second. A rate of 0 disables the limit.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = time.time()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.time()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def warm_page(page_id, site_id, force=False):
+    """
+    Renders a single Page instance of a site into the page cache. Runs
+    inside a pool worker, so it closes the worker's database connection when
+    done.
+
+    Returns:
+        (tuple): The page path and whether it was rendered.
+    """
+    try:
+        page = load_page(id=page_id)
+        if page is None:
+            raise Page.DoesNotExist('Page %s no longer exists' % page_id)
+        entry = cache.get_page(page.path, site_id)
+        if not force and entry is not None and not entry[1]:
+            return page.path, False
+        request = RequestFactory().get('/' + page.path)
+        request.site_id = site_id
+        cache.set_page(page.path, cache.render_page(page, request), site_id)
+        return page.path, True
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Renders every page of every site into the page cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of pages rendered concurrently.',
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Use a process pool instead of a thread pool. Only useful '
+                 'with a cache backend shared between processes.',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=0,
+            help='Maximum number of pages rendered per second. 0 means '
+                 'no limit.',
+        )
+        parser.add_argument(
+            '--by-traffic',
+            action='store_true',
+            help='Render the most requested pages first. Requires '
+                 'JUSCMS_RECORD_TRAFFIC.',
+        )
+        parser.add_argument(
+            '--site',
+            type=int,
+            help='Only render the pages of the Site with this id.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Render pages that are already cached.',
+        )
+
+    def handle(self, *args, **options):
+        pages = Page.objects.values_list('id', 'site_id', 'path')
+        if options['site'] is not None:
+            pages = pages.filter(site_id=options['site'])
+        pages = list(pages)
+        if options['by_traffic']:
+            paths = {}
+            for page_id, site_id, path in pages:
+                paths.setdefault(site_id, []).append(path)
+            hits = {}
+            for site_id, site_paths in paths.items():
+                for path, count in cache.get_hits(site_paths, site_id).items():
+                    hits[site_id, path] = count
+            pages.sort(key=lambda page: hits[page[1:]], reverse=True)
+
+        if options['processes']:
+            # Forked workers must not share the parent's connection.
+            connection.close()
+            pool = futures.ProcessPoolExecutor(options['workers'])
+        else:
+            pool = futures.ThreadPoolExecutor(options['workers'])
+
+        self.total = len(pages)
+        self.done = 0
+        self.rendered = 0
+        self.verbosity = options['verbosity']
+        self.progress_lock = threading.Lock()
+        limiter = RateLimiter(options['rate'])
+        started = time.time()
+        with pool:
+            for page_id, site_id, path in pages:
+                limiter.wait()
+                job = pool.submit(
+                    warm_page,
+                    page_id,
+                    site_id,
+                    options['force'],
+                )
+                job.add_done_callback(self.report)
+
+        self.stdout.write(
+            'Warmed %d of %d pages in %.1fs' % (
+                self.rendered, self.total, time.time() - started,
+            )
+        )
+
+    def report(self, job):
+        """
+        Called as each page finishes rendering to report progress.
+        """
+        with self.progress_lock:
+            self.done += 1
+            try:
+                path, rendered = job.result()
+            except Exception as e:
+                self.stderr.write('Failed to render page: %s' % e)
+                return
+            self.rendered += rendered
+            if self.verbosity > 1:
+                self.stdout.write(
+                    '[%d/%d] /%s' % (self.done, self.total, path)
+                )
+            elif self.done % 100 == 0:
+                self.stdout.write('%d/%d pages' % (self.done, self.total))
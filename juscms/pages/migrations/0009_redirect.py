@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.1 on 2026-10-19 09:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0008_page_style'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Redirect',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_path', models.CharField(max_length=800, unique=True, verbose_name='Old URL Path')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redirects', to='pages.Page', verbose_name='Page')),
+            ],
+            options={
+                'verbose_name': 'Redirect',
+                'verbose_name_plural': 'Redirects',
+            },
+        ),
+    ]
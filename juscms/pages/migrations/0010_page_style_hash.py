@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.1 on 2026-10-19 13:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def compile_styles(apps, schema_editor):
+    from pages.styles import compile_style
+    Page = apps.get_model('pages', 'Page')
+    for page_id, style in Page._default_manager.exclude(style='').values_list(
+        'id',
+        'style',
+    ):
+        Page._default_manager.filter(id=page_id).update(
+            style_hash=compile_style(style),
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0009_redirect'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='style_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40, verbose_name='Stylesheet Hash'),
+        ),
+        migrations.RunPython(compile_styles, migrations.RunPython.noop),
+    ]
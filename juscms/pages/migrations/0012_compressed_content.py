@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+import jusutils.fields
+
+
+def compress_content(apps, schema_editor):
+    from jusutils.fields import copy_field
+    copy_field(apps.get_model('pages', 'Page'), 'style', 'style_compressed')
+    copy_field(
+        apps.get_model('pages', 'Chunk'),
+        'content',
+        'content_compressed',
+    )
+
+
+def decompress_content(apps, schema_editor):
+    from jusutils.fields import copy_field
+    copy_field(apps.get_model('pages', 'Page'), 'style_compressed', 'style')
+    copy_field(
+        apps.get_model('pages', 'Chunk'),
+        'content_compressed',
+        'content',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0011_page_profile_permission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='style_compressed',
+            field=jusutils.fields.CompressedTextField(blank=True, default='', verbose_name='Page Specific CSS'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='chunk',
+            name='content_compressed',
+            field=jusutils.fields.CompressedTextField(blank=True, default='', verbose_name='HTML Content'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(compress_content, decompress_content),
+        migrations.RemoveField(
+            model_name='page',
+            name='style',
+        ),
+        migrations.RemoveField(
+            model_name='chunk',
+            name='content',
+        ),
+        migrations.RenameField(
+            model_name='page',
+            old_name='style_compressed',
+            new_name='style',
+        ),
+        migrations.RenameField(
+            model_name='chunk',
+            old_name='content_compressed',
+            new_name='content',
+        ),
+    ]
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import pages.sites
+
+
+def create_default_site(apps, schema_editor):
+    """
+    Creates the default Site before existing rows are assigned to it, since
+    django.contrib.sites only creates it after every migration has run.
+    """
+    from django.conf import settings
+    Site = apps.get_model('sites', 'Site')
+    Site.objects.get_or_create(
+        pk=getattr(settings, 'SITE_ID', 1),
+        defaults={'domain': 'example.com', 'name': 'example.com'},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sites', '0002_alter_domain_unique'),
+        ('pages', '0012_compressed_content'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_site, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='page',
+            name='site',
+            field=models.ForeignKey(default=pages.sites.default_site_id, on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='sites.Site', verbose_name='Site'),
+        ),
+        migrations.AddField(
+            model_name='redirect',
+            name='site',
+            field=models.ForeignKey(default=pages.sites.default_site_id, on_delete=django.db.models.deletion.CASCADE, related_name='redirects', to='sites.Site', verbose_name='Site'),
+        ),
+        migrations.AlterField(
+            model_name='redirect',
+            name='old_path',
+            field=models.CharField(max_length=800, verbose_name='Old URL Path'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='redirect',
+            unique_together=set([('site', 'old_path')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='page',
+            index_together=set([('site', 'path')]),
+        ),
+    ]
@@ -1,11 +1,19 @@
-from django.db import models
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db import models, transaction
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.template.defaultfilters import slugify
 from django.core.urlresolvers import reverse
 
+from mptt.exceptions import InvalidMove
 from mptt.models import MPTTModel, TreeForeignKey
 
+from jusutils.fields import CompressedTextField
+
+from . import cache, routing, sites, styles, tasks, tree
+
 
 class Page(MPTTModel):
     """
@@ -18,6 +26,10 @@ class Page(MPTTModel):
             Traversal to build a reference tree for objects.
 
     Attributes:
+        site(object): The Site the page belongs to. Every page of a tree
+            belongs to the site of its root page, and paths are only unique
+            within a site, so several sites can be served from one
+            deployment.
         title(string): The page title. Used mainly for reference in the admin
             interface.
         slug(string): The URL slug version of the page name. This is used to
@@ -40,12 +52,23 @@ class Page(MPTTModel):
         is_home(boolean): If set to true the page instance will be set as the
             home page, the path attribute will be set to a blank string, and
             the parent attribute will be set to None. Any other page that has
-            this attribute set to True will have is_home set to False.
+            this attribute set to True on the same site will have is_home set
+            to False.
         style(string): This field is for adding additional custom CSS styling
-            to a specific page instance. This CSS will then be dynamically
-            inserted into the head element in 'base.html'. This ensures that
-            page specific styles are not applied to the entire site.
+            to a specific page instance. This CSS is compiled into a
+            stylesheet that is linked from the head element in 'base.html'.
+            This ensures that page specific styles are not applied to the
+            entire site.
+        style_hash(string): The content hash of the compiled stylesheet, see
+            pages.styles. Pages with the same CSS share one stylesheet. Empty
+            if the page has no style.
     """
+    site = models.ForeignKey(
+        Site,
+        verbose_name='Site',
+        related_name='pages',
+        default=sites.default_site_id,
+    )
     title = models.CharField(
         verbose_name='Page Title',
         blank=False,
@@ -91,14 +114,26 @@ class Page(MPTTModel):
         help_text="This will override the current home page.",
         default=False,
     )
-    style = models.TextField(
+    style = CompressedTextField(
         verbose_name='Page Specific CSS',
         blank=True,
     )
+    style_hash = models.CharField(
+        verbose_name='Stylesheet Hash',
+        blank=True,
+        max_length=40,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Page'
         verbose_name_plural = 'Pages'
+        index_together = [
+            ('site', 'path'),
+        ]
+        permissions = (
+            ('profile_page', 'Can profile page renders'),
+        )
 
     class MPTTMeta:
         order_insertion_by = ['title']
@@ -106,6 +141,8 @@ class Page(MPTTModel):
     def build_path(self):
         """
         This method builds a string containing the Page instance URL path.
+        The home page is served at the site root, so its slug is left out of
+        the paths of its descendants, as in pages.tree.update_paths.
 
         Variables:
             path(string): Initialized as an empty string. Will be populated
@@ -119,7 +156,8 @@ class Page(MPTTModel):
         path = ''
         path_list = self.get_ancestors(include_self=True)
         for item in path_list:
-            path += item.slug + '/'
+            if not item.is_home:
+                path += item.slug + '/'
         return path
 
     def get_absolute_url(self):
@@ -127,11 +165,30 @@ class Page(MPTTModel):
         Generates the absolute URL of the Page instance. This is used in the
         admin to enable the 'View on site' button.
         """
+        if not self.path:
+            return reverse('pages:home')
         return reverse(
             'pages:base_view',
             kwargs={'path': self.path},
         )
 
+    def clean(self):
+        """
+        Checks that the page belongs to the same site as its parent and, for
+        a page changing site, that it has no subpages left on the old one.
+        """
+        if self.parent_id and self.parent.site_id != self.site_id:
+            raise ValidationError({
+                'site': 'A page must belong to the site of its parent page.',
+            })
+        if self.pk and Page.objects.filter(parent_id=self.pk).exclude(
+            site_id=self.site_id,
+        ).exists():
+            raise ValidationError({
+                'site': 'Move the subpages of this page before moving it to '
+                        'another site.',
+            })
+
     def save(self, *args, **kwargs):
         """
         This method overrides the default Django model save method in order
@@ -140,7 +197,42 @@ class Page(MPTTModel):
         is_home attribute set to True. If so, it sets the Page instance
         path attribute to an empty string, and the parent attribute to None. It
         also checks if the slug attribute has changed and updates it accordingly.
+        A changed page style is compiled into its stylesheet file, and the
+        removal of the previous file is scheduled, see
+        pages.tasks.collect_style. New pages take
+        the site of their parent page, and pages cannot be moved under a page
+        of another site.
+
+        The whole save, including the signal receivers that update the paths
+        of the page and its descendants, runs in one transaction with the
+        page tree locked, see pages.tree.mutate.
+        """
+        tree.mutate(lambda: self._save(*args, **kwargs), self)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
         """
+        Remembers the style a Page instance was loaded with, so saving it
+        only compiles the stylesheet when the style changed.
+        """
+        instance = super(Page, cls).from_db(db, field_names, values)
+        instance._loaded_style = instance.__dict__.get('style')
+        return instance
+
+    def _save(self, *args, **kwargs):
+        if self.pk is None or self.style != getattr(
+            self, '_loaded_style', None,
+        ):
+            old_hash = self.style_hash
+            self.style_hash = styles.compile_style(self.style)
+            self._loaded_style = self.style
+            if old_hash and old_hash != self.style_hash:
+                tasks.collect_style.schedule(styles.retention(), old_hash)
+        if self.parent_id and (self.pk is None or tree.tree_changed(self)):
+            if self.pk is None:
+                self.site_id = self.parent.site_id
+            elif self.parent.site_id != self.site_id:
+                raise InvalidMove('A page cannot move to another site.')
         if not self.is_home:
             new_slug = slugify(self.title)
             if not self.slug:
@@ -148,9 +240,12 @@ class Page(MPTTModel):
             elif self.slug:
                 if self.slug != new_slug:
                     self.slug = new_slug
-            super(Page, self).save(*args, **kwargs)
+            self._save_node(*args, **kwargs)
         else:
-            current_home = Page.objects.filter(is_home=True)
+            current_home = Page.objects.filter(
+                is_home=True,
+                site_id=self.site_id,
+            )
             if current_home:
                 for item in current_home:
                     if item != self:
@@ -158,11 +253,26 @@ class Page(MPTTModel):
                         item.save()
                 self.path = ''
                 self.parent = None
-                super(Page, self).save(*args, **kwargs)
+                self._save_node(*args, **kwargs)
             else:
                 self.path = ''
                 self.parent = None
-                super(Page, self).save(*args, **kwargs)
+                self._save_node(*args, **kwargs)
+
+    def _save_node(self, *args, **kwargs):
+        tree.refresh(self)
+        super(Page, self).save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Deletes the Page instance and its subtree in one transaction with the
+        page tree locked, see pages.tree.mutate. The tree fields are reloaded
+        first since MPTT closes the gap left in the tree using them.
+        """
+        def delete():
+            self._mptt_refresh()
+            return super(Page, self).delete(*args, **kwargs)
+        return tree.mutate(delete, self)
 
     def __str__(self):
         return self.title
@@ -261,7 +371,7 @@ class Chunk(HTMLContent):
         max_length=300,
         default='pages/chunk.html',
     )
-    content = models.TextField(
+    content = CompressedTextField(
         verbose_name='HTML Content',
         blank=True,
     )
@@ -281,23 +391,175 @@ class Chunk(HTMLContent):
             return "Chunk - Id: %s, Class: %s" % (self.html_ids, self.html_class)
 
 
+class Redirect(models.Model):
+    """
+    Records a URL path that used to belong to a Page instance so requests for
+    it can be permanently redirected to the Page instance's current path.
+    Redirects are created automatically when a Page instance's path changes.
+
+    Attributes:
+        site(object): The Site of the Page instance. Old paths are unique
+            within a site.
+        old_path(string): The former URL path.
+        page(object): The Page instance that used to live at old_path.
+        created(datetime): When the path changed.
+    """
+    site = models.ForeignKey(
+        Site,
+        verbose_name='Site',
+        related_name='redirects',
+        default=sites.default_site_id,
+    )
+    old_path = models.CharField(
+        verbose_name='Old URL Path',
+        max_length=800,
+    )
+    page = models.ForeignKey(
+        Page,
+        verbose_name='Page',
+        related_name='redirects',
+    )
+    created = models.DateTimeField(
+        verbose_name='Created',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Redirect'
+        verbose_name_plural = 'Redirects'
+        unique_together = [
+            ('site', 'old_path'),
+        ]
+
+    def __str__(self):
+        return '%s -> %s' % (self.old_path, self.page.path)
+
+
+@receiver(post_delete, sender=Redirect)
+def discard_redirect(sender, instance, using, **kwargs):
+    """
+    Removes a deleted Redirect from the in-process redirect map once the
+    deletion is committed.
+    """
+    old_path, site_id = instance.old_path, instance.site_id
+    transaction.on_commit(
+        lambda: routing.redirects.discard(old_path, site_id),
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def clear_sites(sender, instance, using, **kwargs):
+    """
+    Clears the in-process host to Site map once a Site change is committed,
+    see pages.sites. Other worker processes reload theirs within
+    'JUSCMS_SITE_MAP_TIMEOUT' seconds.
+    """
+    transaction.on_commit(sites.hosts.clear, using=using)
+
+
 @receiver(post_save, sender=Page)
 def update_path(sender, instance, **kwargs):
     """
     This function listens to the save signal sent by a Page instance after it
     has been created or modified and performs some logic to make sure that it
-    is callable by the view and sits correctly into the page tree.
+    is callable by the view and sits correctly into the page tree. When the
+    path of an existing Page instance changes, the paths of its descendants
+    are updated along with it, including when a page becomes or stops being
+    the home page, whose slug is not part of its descendants' paths.
     """
-    if instance.is_home is False:
+    if instance.is_home:
+        if not instance.is_leaf_node():
+            tree.update_paths(instance)
+    else:
         if not instance.path:
             if instance.parent:
                 instance.move_to(instance.parent)
             instance.path = instance.build_path()
             instance.save()
+            if not instance.is_leaf_node():
+                tree.update_paths(instance)
         elif instance.path:
             new_path = instance.build_path()
             if instance.path != new_path:
-                instance.path = new_path
-                instance.save()
+                tree.update_paths(instance)
             else:
                 pass
+
+
+def queue_render(path, site_id):
+    """
+    Queues a background re-render of a changed page when
+    'JUSCMS_RERENDER_ON_SAVE' is enabled. Otherwise the page is re-rendered
+    by the first request that gets the stale version.
+    """
+    if getattr(settings, 'JUSCMS_RERENDER_ON_SAVE', False):
+        tasks.render_page.delay(path, site_id)
+
+
+@receiver(post_save, sender=Page)
+def invalidate_page(sender, instance, using, **kwargs):
+    """
+    Marks a Page instance as stale in the page cache whenever it is saved so
+    the current version is rendered. The path is also removed from the
+    negative lookup cache in case it was requested before the page existed,
+    and any redirect away from the path is dropped since the path is live
+    again.
+
+    The caches are only updated once the save is committed. Otherwise a
+    request arriving in between would render the page as it was before the
+    save and cache it as fresh, and a rolled back save would leave the
+    caches describing paths that do not exist.
+    """
+    site_id = instance.site_id
+    path = instance.path
+    Redirect.objects.filter(site_id=site_id, old_path=path).delete()
+
+    def invalidate():
+        cache.invalidate_page(path, site_id=site_id)
+        queue_render(path, site_id)
+        routing.missing_paths.discard((site_id, path))
+        routing.redirects.discard(path, site_id)
+        routing.redirects.advance(routing.bump_version())
+    transaction.on_commit(invalidate, using=using)
+
+
+@receiver(post_delete, sender=Page)
+def delete_page(sender, instance, using, **kwargs):
+    """
+    Removes a deleted Page instance from the page cache once the deletion is
+    committed, and schedules the removal of its stylesheet, see
+    pages.tasks.collect_style.
+    """
+    path, site_id = instance.path, instance.site_id
+    transaction.on_commit(
+        lambda: cache.delete_page(path, site_id=site_id),
+        using=using,
+    )
+    if instance.style_hash:
+        tasks.collect_style.schedule(styles.retention(), instance.style_hash)
+
+
+@receiver(post_save, sender=Row)
+@receiver(post_delete, sender=Row)
+@receiver(post_save, sender=Chunk)
+@receiver(post_delete, sender=Chunk)
+def invalidate_content(sender, instance, using, **kwargs):
+    """
+    Marks the Page instance that owns a Row or Chunk as stale in the page
+    cache once the content object's save or deletion is committed. When a
+    Page is deleted its content objects are deleted with it and the parent
+    may no longer exist, in which case the Page receiver has already
+    invalidated the path.
+    """
+    try:
+        row = instance if sender is Row else instance.parent
+        path, site_id = row.parent.path, row.parent.site_id
+    except ObjectDoesNotExist:
+        return
+
+    def invalidate():
+        cache.invalidate_page(path, site_id=site_id)
+        queue_render(path, site_id)
+    transaction.on_commit(invalidate, using=using)
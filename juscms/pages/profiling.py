@@ -0,0 +1,282 @@
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db.backends.utils import CursorWrapper
+from django.template.base import Template
+from django.utils.text import slugify
+
+from . import cache, sites
+
+
+PROFILE_PARAMETER = 'juscms_profile'
+PROFILE_HEADER = 'HTTP_X_JUSCMS_PROFILE'
+
+# The profile being recorded by the current thread, if any.
+state = threading.local()
+
+# Template and cursor methods are only wrapped while at least one profile is
+# being recorded, so requests that are not profiled pay nothing.
+_lock = threading.Lock()
+_installed = 0
+_originals = {}
+
+
+def requested(request):
+    """
+    Checks whether a request asks to be profiled, with the 'juscms_profile'
+    query parameter or the 'X-Juscms-Profile' header, and is allowed to. Only
+    users with the 'pages.profile_page' permission may profile pages. In the
+    frontend-only mode there are no users, so profiling is never allowed.
+    """
+    if not (
+        request.GET.get(PROFILE_PARAMETER) or request.META.get(PROFILE_HEADER)
+    ):
+        return False
+    user = getattr(request, 'user', None)
+    return user is not None and user.has_perm('pages.profile_page')
+
+
+def _render(self, context):
+    profile = getattr(state, 'profile', None)
+    if profile is None:
+        return _originals['render'](self, context)
+    with profile.frame(self.name or '<string>'):
+        return _originals['render'](self, context)
+
+
+def _execute(self, sql, params=None):
+    profile = getattr(state, 'profile', None)
+    if profile is None:
+        return _originals['execute'](self, sql, params)
+    with profile.query(sql):
+        return _originals['execute'](self, sql, params)
+
+
+def _executemany(self, sql, param_list):
+    profile = getattr(state, 'profile', None)
+    if profile is None:
+        return _originals['executemany'](self, sql, param_list)
+    with profile.query(sql):
+        return _originals['executemany'](self, sql, param_list)
+
+
+def install():
+    global _installed
+    with _lock:
+        if not _installed:
+            _originals['render'] = Template._render
+            _originals['execute'] = CursorWrapper.execute
+            _originals['executemany'] = CursorWrapper.executemany
+            Template._render = _render
+            CursorWrapper.execute = _execute
+            CursorWrapper.executemany = _executemany
+        _installed += 1
+
+
+def uninstall():
+    global _installed
+    with _lock:
+        _installed -= 1
+        if not _installed:
+            Template._render = _originals['render']
+            CursorWrapper.execute = _originals['execute']
+            CursorWrapper.executemany = _originals['executemany']
+
+
+def frame_name(name):
+    """
+    Makes a name usable as a frame in a collapsed stack file, which
+    separates frames with ';' and the stack from its value with a space.
+    """
+    return re.sub(r'[\s;]+', ' ', name).strip().replace(' ', '_')
+
+
+class RenderProfile(object):
+    """
+    Records the time spent in each template and each query while a page is
+    rendered, attributing queries to the template that ran them.
+
+    Attributes:
+        stack(list): The open frames, each a list of its name, start time and
+            the time spent in its children so far.
+        templates(dictionary): Maps template names to a list of their number
+            of renders, total time and self time, in seconds.
+        queries(list): A tuple of the template, SQL and time of every query.
+        collapsed(dictionary): Maps ';' separated stacks of frames to their
+            self time in seconds, the input of flamegraph tools.
+    """
+    def __init__(self, root):
+        self.stack = []
+        self.templates = {}
+        self.queries = []
+        self.collapsed = {}
+        self.root = frame_name(root)
+
+    @contextlib.contextmanager
+    def frame(self, name):
+        entry = [name, time.perf_counter(), 0.0]
+        self.stack.append(entry)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            elapsed = time.perf_counter() - entry[1]
+            self_time = elapsed - entry[2]
+            if self.stack:
+                self.stack[-1][2] += elapsed
+            stats = self.templates.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += self_time
+            self.add_stack([entry[0] for entry in self.stack] + [name],
+                           self_time)
+
+    @contextlib.contextmanager
+    def query(self, sql):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if self.stack:
+                self.stack[-1][2] += elapsed
+            names = [entry[0] for entry in self.stack]
+            self.queries.append((names[-1] if names else '', sql, elapsed))
+            self.add_stack(names + ['SQL ' + sql[:80]], elapsed)
+
+    def add_stack(self, names, seconds):
+        key = ';'.join([self.root] + [frame_name(name) for name in names])
+        self.collapsed[key] = self.collapsed.get(key, 0.0) + seconds
+
+    def write_collapsed(self, stream):
+        for key, seconds in sorted(self.collapsed.items()):
+            stream.write('%s %d\n' % (key, round(seconds * 1000000)))
+
+
+def get_profile_dir():
+    """
+    Returns the directory profiles are stored in, 'JUSCMS_PROFILE_DIR' or a
+    'juscms-profiles' directory in the system's temporary directory.
+    """
+    directory = getattr(settings, 'JUSCMS_PROFILE_DIR', None) or os.path.join(
+        tempfile.gettempdir(),
+        'juscms-profiles',
+    )
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    return directory
+
+
+def prune_profiles(directory):
+    """
+    Deletes all but the newest 'JUSCMS_PROFILE_KEEP' reports, 50 by
+    default, from the profile directory.
+    """
+    keep = getattr(settings, 'JUSCMS_PROFILE_KEEP', 50)
+    reports = {}
+    for name in os.listdir(directory):
+        base, extension = os.path.splitext(name)
+        if extension not in ('.pstats', '.collapsed'):
+            continue
+        try:
+            modified = os.path.getmtime(os.path.join(directory, name))
+        except OSError:
+            continue
+        reports[base] = max(reports.get(base, 0), modified)
+    newest = sorted(reports, key=lambda base: (reports[base], base))
+    for base in newest[:max(0, len(newest) - keep)]:
+        for extension in ('.pstats', '.collapsed'):
+            try:
+                os.remove(os.path.join(directory, base + extension))
+            except OSError:
+                # Already removed by another process pruning at once.
+                pass
+
+
+def profile_render(render, path, site_id=None):
+    """
+    Runs a page render under cProfile while recording the time of every
+    template and query. The fragments of the page's site are rendered too,
+    bypassing the page cache, so the report covers the whole page. Nothing
+    is written to the page cache.
+
+    The report is stored in 'JUSCMS_PROFILE_DIR' as a pstats dump, for
+    pstats or snakeviz, and a collapsed stack file of templates and queries,
+    for flamegraph.pl or speedscope. Older reports are pruned, see
+    prune_profiles.
+
+    Parameters:
+        render(function): Renders the page body, called without arguments.
+        path(string): The path of the page, used to name the report files.
+        site_id(integer): The Site id of the page.
+
+    Returns:
+        report(string): A plain text summary of the profile.
+    """
+    profile = RenderProfile('BaseView %s' % (path or '/'))
+    profiler = cProfile.Profile()
+    install()
+    state.profile = profile
+    try:
+        profiler.enable()
+        try:
+            with profile.frame('page'):
+                render()
+                for name, renderer in sorted(cache.FRAGMENTS.items()):
+                    with profile.frame('fragment:%s' % name):
+                        renderer(site_id or sites.default_site_id())
+        finally:
+            profiler.disable()
+    finally:
+        state.profile = None
+        uninstall()
+
+    # The random suffix keeps reports of the same page recorded in the same
+    # second, by any process, apart.
+    directory = get_profile_dir()
+    base = os.path.join(directory, '%s-%s-%s' % (
+        time.strftime('%Y%m%d-%H%M%S'),
+        slugify(path) or 'home',
+        uuid.uuid4().hex[:8],
+    ))
+    profiler.dump_stats(base + '.pstats')
+    with open(base + '.collapsed', 'w') as stream:
+        profile.write_collapsed(stream)
+    prune_profiles(directory)
+
+    report = io.StringIO()
+    total = profile.templates['page'][1]
+    report.write('Profile of /%s: %.1f ms, %d queries\n' % (
+        path, total * 1000, len(profile.queries),
+    ))
+    report.write('pstats: %s.pstats\ncollapsed: %s.collapsed\n\n' % (
+        base, base,
+    ))
+    report.write('%-40s %6s %10s %10s\n' % (
+        'Template', 'Calls', 'Total ms', 'Self ms',
+    ))
+    for name, stats in sorted(
+        profile.templates.items(),
+        key=lambda item: -item[1][1],
+    ):
+        report.write('%-40s %6d %10.2f %10.2f\n' % (
+            name[:40], stats[0], stats[1] * 1000, stats[2] * 1000,
+        ))
+    report.write('\n%-30s %8s  %s\n' % ('Queried from', 'ms', 'SQL'))
+    for template, sql, seconds in profile.queries:
+        report.write('%-30s %8.2f  %s\n' % (
+            template[:30], seconds * 1000, sql,
+        ))
+    report.write('\n')
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats('cumulative').print_stats(30)
+    return report.getvalue()
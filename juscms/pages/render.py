@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+from .models import Page, Row, Chunk
+
+
+class RenderList(tuple):
+    """
+    A tuple of render objects that also answers 'all', so templates written
+    against related managers, e.g. '{% for row in instance.rows.all %}',
+    work unchanged.
+    """
+    __slots__ = ()
+
+    def all(self):
+        return self
+
+
+PAGE_FIELDS = (
+    'id',
+    'title',
+    'path',
+    'seo_title',
+    'seo_description',
+    'template',
+    'style_hash',
+)
+ROW_FIELDS = (
+    'id',
+    'html_ids',
+    'html_class',
+    'template',
+)
+CHUNK_FIELDS = (
+    'id',
+    'html_ids',
+    'html_class',
+    'template',
+    'content',
+)
+
+
+class PageData(namedtuple('PageData', PAGE_FIELDS + ('rows',))):
+    """
+    The columns of a Page instance that its templates render, together with
+    its rows. Render objects are plain tuples, so they take far less memory
+    than model instances and carry none of the tree fields.
+
+    Custom templates that need more than these fields can call
+    get_instance, e.g. '{% with page=instance.get_instance %}'.
+    """
+    __slots__ = ()
+
+    def get_instance(self):
+        """
+        Returns the full Page instance. Render objects are immutable and
+        hold no cache, so every call runs a query.
+        """
+        return Page.objects.get(id=self.id)
+
+
+RowData = namedtuple('RowData', ROW_FIELDS + ('chunks',))
+ChunkData = namedtuple('ChunkData', CHUNK_FIELDS)
+
+
+def load_page(**filters):
+    """
+    Loads the render objects for the Page instance matching 'filters', using
+    three queries whatever the size of the page.
+
+    Returns:
+        (object): A PageData instance, or None if no Page instance matches.
+    """
+    page = Page.objects.filter(**filters).values_list(*PAGE_FIELDS).first()
+    if page is None:
+        return None
+    page_id = page[0]
+
+    chunks = {}
+    for values in Chunk.objects.filter(
+        parent__parent_id=page_id,
+    ).order_by('id').values_list('parent_id', *CHUNK_FIELDS):
+        chunks.setdefault(values[0], []).append(ChunkData(*values[1:]))
+
+    rows = RenderList(
+        RowData(*values, chunks=RenderList(chunks.get(values[0], ())))
+        for values in Row.objects.filter(
+            parent_id=page_id,
+        ).order_by('id').values_list(*ROW_FIELDS)
+    )
+    return PageData(*page, rows=rows)
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.urlresolvers import reverse
+
+from . import cache
+
+
+class NegativeCache(object):
+    """
+    A bounded, in-process LRU set of paths that are known not to belong to
+    any Page instance of a site, so that requests for them can be answered
+    with a 404 without a database query. Entries are (Site id, path) tuples.
+
+    Entries expire after 'JUSCMS_NEGATIVE_CACHE_TIMEOUT' seconds and the
+    least recently used entries are dropped once the set holds more than
+    'JUSCMS_NEGATIVE_CACHE_SIZE' entries. Every worker process keeps its own
+    set, so the sets are tied to a version number in the page cache which is
+    bumped whenever a Page save is committed. A worker whose set is older
+    than the current version clears it before answering from it.
+
+    Attributes:
+        entries(OrderedDict): Maps (Site id, path) tuples to the time they
+            expire, in least recently used order.
+        version(integer): The routes version the entries were recorded at.
+        lock(object): Guards the entries across request threads.
+    """
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self.lock:
+            expires = self.entries.get(key)
+            if expires is None:
+                return False
+            if expires < time.time():
+                del self.entries[key]
+                return False
+            version = get_version()
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+                return False
+            self.entries.move_to_end(key)
+            return True
+
+    def add(self, key, version):
+        """
+        Records a missing path. 'version' is the routes version read before
+        the database was queried for the path. If it has changed since, a
+        Page may have been committed after the query missed it, so nothing
+        is recorded.
+        """
+        size = getattr(settings, 'JUSCMS_NEGATIVE_CACHE_SIZE', 10000)
+        timeout = getattr(settings, 'JUSCMS_NEGATIVE_CACHE_TIMEOUT', 300)
+        if version != get_version():
+            return
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            self.entries[key] = time.time() + timeout
+            self.entries.move_to_end(key)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class RedirectMap(object):
+    """
+    In-process map of old Page paths to the current path of the Page that
+    used to live there, for every site. It is loaded with a single query the
+    first time it is needed and kept up to date by the Page signal
+    receivers. When another worker process changes the routes version, the
+    map is reloaded on its next use. BaseView only consults the map when a
+    path is not in the page cache, so cached pages never pay for it.
+
+    Attributes:
+        paths(dictionary): Maps (Site id, old path) tuples to current paths.
+            None until the map is loaded.
+        version(integer): The routes version the map was loaded at.
+        lock(object): Guards the map across request threads.
+    """
+    def __init__(self):
+        self.paths = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def get(self, path, site_id):
+        version = get_version()
+        with self.lock:
+            if self.paths is None or version != self.version:
+                self.load(version)
+            return self.paths.get((site_id, path))
+
+    def load(self, version):
+        from .models import Redirect
+        self.paths = dict(
+            ((site_id, old_path), path) for site_id, old_path, path in
+            Redirect.objects.values_list('site_id', 'old_path', 'page__path')
+        )
+        self.version = version
+
+    def move(self, old_path, new_path, site_id):
+        """
+        Records that a Page of a site has moved from old_path to new_path.
+        Redirects that pointed at old_path are pointed at new_path as well.
+        """
+        with self.lock:
+            if self.paths is None:
+                return
+            for key, value in self.paths.items():
+                if key[0] == site_id and value == old_path:
+                    self.paths[key] = new_path
+            self.paths[(site_id, old_path)] = new_path
+            self.paths.pop((site_id, new_path), None)
+
+    def discard(self, path, site_id):
+        with self.lock:
+            if self.paths is not None:
+                self.paths.pop((site_id, path), None)
+
+    def advance(self, version):
+        """
+        Marks the map as current at a version this process just created, as
+        long as it was current at the version before it. The changes behind
+        the new version have already been applied incrementally.
+        """
+        with self.lock:
+            if self.version == version - 1:
+                self.version = version
+
+
+def page_url(path):
+    """
+    Returns the URL of the Page instance with the given path.
+    """
+    if not path:
+        return reverse('pages:home')
+    return reverse('pages:base_view', kwargs={'path': path})
+
+
+def get_version():
+    """
+    Returns the current routes version from the page cache.
+    """
+    return cache.get_cache().get('juscms:routes:version', 0)
+
+
+def bump_version():
+    """
+    Increments the routes version, invalidating the negative caches of every
+    worker process that shares the page cache.
+    """
+    backend = cache.get_cache()
+    try:
+        return backend.incr('juscms:routes:version')
+    except ValueError:
+        backend.add('juscms:routes:version', 1, None)
+        return 1
+
+
+missing_paths = NegativeCache()
+redirects = RedirectMap()
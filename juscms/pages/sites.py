@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.conf import settings
+from django.http.request import split_domain_port
+
+
+def default_site_id():
+    """
+    Returns the id of the Site served for hosts that match no Site domain,
+    the 'SITE_ID' setting. Also the default site of new Page, Header and
+    Footer instances.
+    """
+    return getattr(settings, 'SITE_ID', 1)
+
+
+class SiteMap(object):
+    """
+    In-process map of host names to Site ids, so every site served by a
+    worker pool is resolved from the request host without a database query.
+    It is loaded with a single query the first time it is needed, cleared by
+    the Site signal receivers and reloaded every 'JUSCMS_SITE_MAP_TIMEOUT'
+    seconds, 300 by default, so other worker processes pick up new sites
+    within that time.
+
+    Attributes:
+        hosts(dictionary): Maps lower case Site domains to Site ids. None
+            until the map is loaded.
+        expires(float): The time the map is reloaded at.
+        lock(object): Guards the map across request threads.
+    """
+    def __init__(self):
+        self.hosts = None
+        self.expires = 0
+        self.lock = threading.Lock()
+
+    def get(self, host):
+        """
+        Returns the id of the Site for a host, matched with its port first
+        and without it second, or None if no Site has the host's domain.
+        """
+        host = host.lower()
+        with self.lock:
+            if self.hosts is None or self.expires < time.time():
+                self.load()
+            site_id = self.hosts.get(host)
+            if site_id is None:
+                site_id = self.hosts.get(split_domain_port(host)[0])
+            return site_id
+
+    def load(self):
+        from django.contrib.sites.models import Site
+        self.hosts = dict(
+            (domain.lower(), site_id) for site_id, domain in
+            Site.objects.values_list('id', 'domain')
+        )
+        timeout = getattr(settings, 'JUSCMS_SITE_MAP_TIMEOUT', 300)
+        self.expires = time.time() + timeout
+
+    def clear(self):
+        with self.lock:
+            self.hosts = None
+
+
+def get_site_id(request):
+    """
+    Returns the id of the Site a request is for, looked up by its host in
+    the site map. Hosts that match no Site are served the default site, see
+    default_site_id. The id is stored on the request as 'site_id' so the
+    lookup happens once per request.
+    """
+    site_id = getattr(request, 'site_id', None)
+    if site_id is None:
+        site_id = hosts.get(request.get_host()) or default_site_id()
+        request.site_id = site_id
+    return site_id
+
+
+hosts = SiteMap()
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from . import cache
+
+
+# Comments and quoted strings, matched together so a quote inside a comment
+# or a comment marker inside a string is not mistaken for the other.
+TOKENS = re.compile(
+    r'/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'',
+    re.DOTALL,
+)
+# Whitespace that can go around these characters. Whitespace before ':' is
+# kept since 'a :hover' and 'a:hover' select different elements.
+SPACE = re.compile(r'\s*([{};,>])\s*|(:)\s+')
+
+
+def _minify_code(code):
+    code = re.sub(r'\s+', ' ', code)
+    code = SPACE.sub(lambda match: match.group(1) or match.group(2), code)
+    return code.replace(';}', '}')
+
+
+def minify(css):
+    """
+    Removes comments and redundant whitespace from a stylesheet, leaving
+    quoted strings untouched.
+
+    Returns:
+        css(string): The minified stylesheet.
+    """
+    parts = []
+    code = ''
+    position = 0
+    for match in TOKENS.finditer(css):
+        token = match.group(0)
+        code += css[position:match.start()]
+        if token.startswith('/*'):
+            # A comment separates tokens like whitespace does.
+            code += ' '
+        else:
+            parts.append(_minify_code(code))
+            parts.append(token)
+            code = ''
+        position = match.end()
+    parts.append(_minify_code(code + css[position:]))
+    return ''.join(parts).strip()
+
+
+def style_name(style_hash):
+    return 'styles/%s.css' % style_hash
+
+
+def compile_style(css):
+    """
+    Minifies a stylesheet and stores it under a name derived from its
+    content. Pages with the same CSS share one file, and a file's URL changes
+    whenever its content does, so it can be cached by browsers forever.
+
+    Returns:
+        style_hash(string): The content hash naming the stored file, or an
+            empty string if the stylesheet is empty.
+    """
+    css = minify(css or '')
+    if not css:
+        return ''
+    content = css.encode('utf-8')
+    style_hash = hashlib.sha1(content).hexdigest()[:20]
+    name = style_name(style_hash)
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return style_hash
+
+
+def restore_style(style_hash):
+    """
+    Compiles the stylesheet of a content hash again from a Page instance
+    that uses it. Covers a file deleted while a save that starts using it
+    again was being committed.
+
+    Returns:
+        (boolean): Whether the stylesheet was restored.
+    """
+    from .models import Page
+
+    css = Page.objects.filter(style_hash=style_hash).values_list(
+        'style',
+        flat=True,
+    ).first()
+    return css is not None and compile_style(css) == style_hash
+
+
+def retention():
+    """
+    Returns the number of seconds a stylesheet no page uses anymore is
+    kept, 'JUSCMS_PAGE_CACHE_MAX_STALE'. Stale cached pages that still link
+    it are served for that long after the change, see
+    pages.cache.invalidate_page.
+    """
+    return cache.get_timeouts()[1]
+
+
+def delete_style(style_hash):
+    """
+    Deletes the stored stylesheet with a content hash unless a Page instance
+    uses it. Run by the pages.tasks.collect_style task once the retention
+    period of a stylesheet a page stopped using is over.
+    """
+    from .models import Page
+
+    if not Page.objects.filter(style_hash=style_hash).exists():
+        default_storage.delete(style_name(style_hash))
+
+
+def collect_styles(keep=()):
+    """
+    Deletes the stored stylesheets no Page instance uses that were written
+    more than the retention period ago, such as files compiled by a save
+    that was rolled back. Stylesheets a page stopped using are left to their
+    scheduled pages.tasks.collect_style task.
+
+    Parameters:
+        keep(iterable): Content hashes that must not be deleted.
+
+    Returns:
+        deleted(integer): The number of stylesheets deleted.
+    """
+    from .models import Page
+
+    if not default_storage.exists('styles'):
+        return 0
+    keep = set(keep)
+    keep.update(Page.objects.exclude(style_hash='').values_list(
+        'style_hash',
+        flat=True,
+    ))
+    # FileSystemStorage reports naive local times.
+    cutoff = datetime.now() - timedelta(seconds=retention())
+    deleted = 0
+    for filename in default_storage.listdir('styles')[1]:
+        style_hash, extension = os.path.splitext(filename)
+        name = style_name(style_hash)
+        if extension != '.css' or style_hash in keep:
+            continue
+        if default_storage.modified_time(name) > cutoff:
+            continue
+        default_storage.delete(name)
+        deleted += 1
+    return deleted
@@ -0,0 +1,35 @@
+from taskqueue.queue import pending_args, periodic, task
+
+from . import cache, styles
+
+
+@task
+def render_page(path, site_id=None):
+    """
+    Re-renders a page into the page cache after it changed, so the next
+    visitor does not get the stale version. Saving a page with several rows
+    and chunks queues this once per object, and the queue runs it once.
+    """
+    cache.rerender_page(path, site_id)
+
+
+@task
+def collect_style(style_hash):
+    """
+    Deletes a stylesheet a page stopped using, unless a page uses it again.
+    Scheduled to run once stale cached pages no longer link it, see
+    pages.styles.retention.
+    """
+    styles.delete_style(style_hash)
+
+
+@periodic(60 * 60)
+def collect_styles():
+    """
+    Deletes unused stylesheets nothing else will, see
+    pages.styles.collect_styles. Stylesheets still waiting for their
+    collect_style task are kept.
+    """
+    styles.collect_styles(keep=[
+        args[0] for args in pending_args(collect_style.task_name)
+    ])
@@ -1,6 +1,35 @@
-from django.test import TestCase, Client
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    Client,
+    override_settings,
+)
+from django.contrib.auth.models import User
+from django.contrib.sites.models import Site
+from django.core.management import call_command
 from django.core.urlresolvers import reverse
-from .models import Page
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from jusutils.minify import minify_html
+from jusutils.testing import QueryBudgetMixin, run_on_commit
+
+from mptt.exceptions import InvalidMove
+
+from taskqueue.models import Task
+
+from . import cache, profiling, routing, sites, styles, tasks, tree
+from .models import Page, Row, Chunk, Redirect
+from .render import load_page
+from .tree import move_page
 
 
 class PageTest(TestCase):
@@ -29,3 +58,776 @@ class PageTest(TestCase):
             response.status_code,
             200
         )
+
+
+class WarmCacheTest(TransactionTestCase):
+
+    def test_warmcache_renders_pages(self):
+
+        cache.get_cache().clear()
+        Page(title='Cached Page').save()
+        page = Page.objects.get(title='Cached Page')
+
+        call_command('warmcache', stdout=StringIO())
+
+        self.assertIsNotNone(cache.get_page(page.path))
+
+
+class PageCacheTest(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.page = Page(
+            title='Cached Page',
+            is_home=False
+        )
+        self.page.save()
+        self.page = Page.objects.get(id=self.page.id)
+
+    def test_saving_page_invalidates_cache(self):
+
+        cache.set_page(self.page.path, (b'stale',))
+
+        self.page.seo_title = 'Updated'
+        with run_on_commit():
+            self.page.save()
+
+        content, stale = cache.get_page(self.page.path)
+        self.assertEqual(content, b'stale')
+        self.assertTrue(stale)
+
+    def test_marker_like_content_is_not_stitched(self):
+
+        row = Row.objects.create(parent=self.page)
+        Chunk.objects.create(parent=row, content=(
+            '<!--juscms:fragment:foo--><!--juscms:fragment:footer-->'
+        ))
+        cache.get_cache().clear()
+
+        response = Client().get('/' + self.page.path)
+
+        self.assertContains(response, '<!--juscms:fragment:foo-->')
+        self.assertContains(response, '<!--juscms:fragment:footer-->')
+
+    def test_fragments_are_minified_once_enabled(self):
+
+        footer = cache.FRAGMENTS['footer'](1).decode('utf-8')
+
+        with self.settings(JUSCMS_MINIFY_HTML=True):
+            minified = cache.set_fragment('footer')
+
+        self.assertEqual(minified, minify_html(footer).encode('utf-8'))
+        self.assertEqual(cache.set_fragment('footer'), footer.encode('utf-8'))
+
+    @override_settings(JUSCMS_PAGE_REFRESH_IN_BACKGROUND=False)
+    def test_stale_page_is_served_and_refreshed(self):
+
+        cache.set_page(self.page.path, (b'stale',))
+        cache.invalidate_page(self.page.path)
+
+        response = Client().get('/' + self.page.path)
+
+        self.assertEqual(response.content, b'stale')
+        content, stale = cache.get_page(self.page.path)
+        self.assertFalse(stale)
+        self.assertIn(b'Cached Page', content)
+
+    @override_settings(JUSCMS_PAGE_REFRESH_IN_BACKGROUND=False)
+    def test_stale_page_is_refreshed_once(self):
+
+        cache.set_page(self.page.path, (b'stale',))
+        cache.invalidate_page(self.page.path)
+        cache.acquire_render_lock(self.page.path)
+
+        cache.refresh_page(self.page.path)
+
+        content, stale = cache.get_page(self.page.path)
+        self.assertTrue(stale)
+
+
+class CommitInvalidationTest(TransactionTestCase):
+
+    @override_settings(JUSCMS_PAGE_REFRESH_IN_BACKGROUND=False)
+    def test_read_before_commit_does_not_cache_old_content(self):
+
+        cache.get_cache().clear()
+        Page(title='Committed').save()
+        page = Page.objects.get(title='Committed')
+        client = Client()
+        client.get('/' + page.path)
+        sites.hosts.get('testserver')
+
+        def read():
+            try:
+                return client.get('/' + page.path)
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            page.seo_title = 'Uncommitted'
+            page.save()
+            with ThreadPoolExecutor(1) as pool:
+                response = pool.submit(read).result()
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(cache.get_page(page.path)[1])
+
+        self.assertTrue(cache.get_page(page.path)[1])
+        client.get('/' + page.path)
+        content, stale = cache.get_page(page.path)
+        self.assertFalse(stale)
+        self.assertIn(b'Uncommitted', content)
+
+
+class NegativeCacheTest(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        routing.missing_paths.clear()
+
+    def test_unknown_path_is_not_queried_twice(self):
+
+        client = Client()
+        client.get('/does-not-exist/')
+
+        with self.assertNumQueries(0):
+            response = client.get('/does-not-exist/')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_path_committed_during_lookup_is_not_recorded(self):
+
+        version = routing.get_version()
+        routing.bump_version()
+
+        routing.missing_paths.add((1, 'new-page/'), version)
+
+        self.assertNotIn((1, 'new-page/'), routing.missing_paths)
+
+    def test_creating_page_clears_path(self):
+
+        client = Client()
+        client.get('/new-page/')
+
+        with run_on_commit():
+            Page(title='New Page').save()
+
+        response = client.get('/new-page/')
+
+        self.assertEqual(response.status_code, 200)
+
+
+class RedirectTest(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        routing.missing_paths.clear()
+
+    def test_renamed_page_redirects_old_path(self):
+
+        page = Page(title='Old Title')
+        page.save()
+        page = Page.objects.get(id=page.id)
+        old_path = page.path
+
+        page.title = 'New Title'
+        with run_on_commit():
+            page.save()
+        page = Page.objects.get(id=page.id)
+
+        response = Client().get('/' + old_path)
+
+        self.assertEqual(response.status_code, 301)
+        self.assertTrue(response['Location'].endswith('/' + page.path))
+
+
+class SiteTest(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        routing.missing_paths.clear()
+        with run_on_commit():
+            self.site = Site.objects.create(
+                domain='other.example',
+                name='Other',
+            )
+
+    def test_same_path_is_served_per_site(self):
+
+        Page(title='About').save()
+        page = Page(title='About', site=self.site)
+        page.save()
+        Row.objects.create(parent=page)
+        Chunk.objects.create(
+            parent=page.rows.get(),
+            content='<p>Other site</p>',
+        )
+        client = Client()
+
+        default = client.get('/about/')
+        other = client.get('/about/', HTTP_HOST='other.example')
+
+        self.assertNotContains(default, 'Other site')
+        self.assertContains(other, 'Other site')
+        self.assertEqual(
+            client.get('/missing/', HTTP_HOST='other.example').status_code,
+            404,
+        )
+        Page(title='Missing').save()
+        self.assertEqual(
+            client.get('/missing/', HTTP_HOST='other.example').status_code,
+            404,
+        )
+
+    def test_pages_cannot_move_between_sites(self):
+
+        parent = Page(title='Parent', site=self.site)
+        parent.save()
+        child = Page(title='Child', parent=parent)
+        child.save()
+        other = Page(title='Other')
+        other.save()
+
+        self.assertEqual(Page.objects.get(id=child.id).site, self.site)
+        with self.assertRaises(InvalidMove):
+            move_page(child, other)
+
+
+def build_page(title, parent=None, rows=0, chunks=0):
+    """
+    Creates a Page instance with 'rows' rows of 'chunks' chunks each and
+    returns it reloaded from the database.
+    """
+    page = Page(title=title, parent=parent)
+    page.save()
+    page = Page.objects.get(id=page.id)
+    for i in range(rows):
+        row = Row.objects.create(parent=page, html_class='row-%d' % i)
+        for j in range(chunks):
+            Chunk.objects.create(parent=row, content='<p>%d.%d</p>' % (i, j))
+    return page
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    Guards against query count regressions. The budgets are fixed upper
+    bounds that must not depend on page size or tree depth. Budgets for
+    saves include the SAVEPOINT and RELEASE of the tree lock transaction,
+    which runs inside the test's transaction.
+    """
+
+    def setUp(self):
+        cache.get_cache().clear()
+        routing.missing_paths.clear()
+
+    def test_render_queries_do_not_grow_with_page_size(self):
+
+        client = Client()
+        for rows, chunks in ((1, 1), (5, 5), (20, 10)):
+            page = build_page(
+                'Page %dx%d' % (rows, chunks),
+                rows=rows,
+                chunks=chunks,
+            )
+            cache.get_cache().clear()
+            with self.assertQueryBudget(6):
+                response = client.get('/' + page.path)
+            self.assertEqual(response.status_code, 200)
+
+    def test_cached_render_runs_no_queries(self):
+
+        page = build_page('Cached', rows=3, chunks=3)
+        client = Client()
+        client.get('/' + page.path)
+
+        with self.assertQueryBudget(0):
+            client.get('/' + page.path)
+
+    def test_save_queries_do_not_grow_with_depth(self):
+
+        parent = None
+        for depth in range(1, 7):
+            page = Page(title='Level %d' % depth, parent=parent)
+            with self.assertQueryBudget(12):
+                page.save()
+            parent = Page.objects.get(id=page.id)
+            parent.seo_title = 'Updated'
+            with self.assertQueryBudget(6):
+                parent.save()
+
+    def test_move_queries_do_not_grow_with_subtree_size(self):
+
+        for size in (1, 5, 20):
+            target = build_page('Target %d' % size)
+            root = build_page('Root %d' % size)
+            for i in range(size - 1):
+                build_page('Child %d %d' % (size, i), parent=root)
+            root = Page.objects.get(id=root.id)
+            root.parent = Page.objects.get(id=target.id)
+            with self.assertQueryBudget(14):
+                root.save()
+
+    def test_admin_change_form_queries(self):
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        client = Client()
+        client.login(username='admin', password='admin')
+        page = build_page('Admin Page', rows=5, chunks=3)
+        url = reverse('admin:pages_page_change', args=(page.id,))
+
+        with self.assertQueryBudget(15):
+            response = client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+
+
+class LoadPageTest(QueryBudgetMixin, TestCase):
+
+    def test_load_page_returns_rows_and_chunks_in_order(self):
+
+        page = build_page('Lean', rows=3, chunks=2)
+
+        with self.assertQueryBudget(3):
+            data = load_page(path=page.path)
+
+        self.assertEqual(data.title, 'Lean')
+        self.assertEqual(
+            [chunk.content for row in data.rows.all() for chunk in row.chunks],
+            [
+                '<p>%d.%d</p>' % (i, j)
+                for i in range(3) for j in range(2)
+            ],
+        )
+        self.assertEqual(data.get_instance(), page)
+        self.assertIsNone(load_page(path='missing/'))
+
+
+class APITest(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        sites.hosts.get('testserver')
+        self.client = Client()
+
+    def test_page_is_cached_until_it_changes(self):
+
+        page = build_page('Api Page', rows=2, chunks=2)
+        url = reverse('pages:api_page')
+        query = {'path': page.path, 'fields': 'title,rows'}
+
+        with self.assertQueryBudget(3):
+            response = self.client.get(url, query)
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(sorted(data), ['rows', 'title'])
+        self.assertEqual(data['rows'][1]['chunks'][0]['content'], '<p>1.0</p>')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(
+                url,
+                query,
+                HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(cached.status_code, 304)
+
+        page.title = 'Api Page Renamed'
+        page.save()
+        query['path'] = Page.objects.get(id=page.id).path
+        response = self.client.get(url, query)
+        self.assertEqual(
+            json.loads(response.content.decode('utf-8'))['title'],
+            'Api Page Renamed',
+        )
+        self.assertEqual(
+            self.client.get(url, {'path': 'missing/'}).status_code,
+            404,
+        )
+
+    def test_list_is_invalidated_when_the_save_commits(self):
+
+        page = build_page('Listed Page')
+        url = reverse('pages:api_pages')
+        self.client.get(url)
+        page = Page.objects.get(id=page.id)
+        page.seo_title = 'Updated'
+
+        with run_on_commit():
+            page.save()
+            response = self.client.get(url)
+            self.assertNotIn(b'Updated', response.content)
+
+        response = self.client.get(url)
+        self.assertIn(b'Updated', response.content)
+
+    def test_api_does_not_shadow_pages(self):
+
+        parent = build_page('Api')
+        page = build_page('Page', parent=parent)
+
+        response = self.client.get('/' + page.path)
+
+        self.assertEqual(page.path, 'api/page/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+    def test_subtree_is_paginated_by_cursor(self):
+
+        root = build_page('Root')
+        for i in range(5):
+            child = build_page('Child %d' % i, parent=root)
+        build_page('Grandchild', parent=child)
+        url = reverse('pages:api_pages')
+
+        titles = []
+        next_url = '%s?parent=%s&depth=all&limit=2&fields=title' % (
+            url, root.path,
+        )
+        while next_url:
+            with self.assertQueryBudget(2):
+                data = json.loads(
+                    self.client.get(next_url).content.decode('utf-8')
+                )
+            titles.extend(page['title'] for page in data['results'])
+            next_url = data['next']
+
+        self.assertEqual(titles, [
+            page.title for page in Page.objects.get(
+                id=root.id,
+            ).get_descendants()
+        ])
+        self.assertEqual(len(titles), 6)
+        response = self.client.get(url, {'parent': root.path})
+        self.assertEqual(
+            len(json.loads(response.content.decode('utf-8'))['results']),
+            5,
+        )
+        self.assertEqual(
+            self.client.get(url, {'fields': 'secret'}).status_code,
+            400,
+        )
+
+
+class CheckLinksTest(TestCase):
+
+    def test_broken_and_moved_links_are_reported(self):
+
+        about = build_page('About')
+        contact = build_page('Contact')
+        old_path = contact.path
+        contact.title = 'Contact Us'
+        contact.save()
+        row = Row.objects.create(parent=about)
+        chunk = Chunk.objects.create(parent=row, content=(
+            '<a href="/about/">Self</a> <a href="/%s">Moved</a> '
+            '<a href="/missing/">Missing</a> <a href="../gone/">Gone</a> '
+            '<a href="https://example.org/missing/">External</a> '
+            '<a href="http://WWW.Example.com.:8000/lost/">Own host</a> '
+            '<a href="/api/pages.json">Api</a> <a href="#top">Top</a> '
+            '<!-- <a href="/draft/">Draft</a> -->'
+        ) % old_path)
+        source = '/about/ chunk %d' % chunk.id
+        output = StringIO()
+
+        call_command('checklinks', workers=1, stdout=output)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[:4], [
+            '%s: /%s redirects to /contact-us/' % (source, old_path),
+            '%s: ../gone/ is broken' % source,
+            '%s: /missing/ is broken' % source,
+            '%s: http://WWW.Example.com.:8000/lost/ is broken' % source,
+        ])
+        self.assertIn('Checked 6 links', lines[4])
+
+
+class StyleTest(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_page_styles_are_linked_and_shared(self):
+
+        first = Page(title='First', style='p {\n  color: red;\n}')
+        first.save()
+        second = Page(title='Second', style='/* same */ p { color: red }')
+        second.save()
+        self.assertTrue(first.style_hash)
+        self.assertEqual(first.style_hash, second.style_hash)
+
+        client = Client()
+        url = reverse('pages:style', args=(first.style_hash,))
+        page = Page.objects.get(id=first.id)
+        self.assertContains(client.get('/' + page.path), url)
+        response = client.get(url)
+
+        self.assertEqual(response.content, b'p{color:red}')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_unused_stylesheets_are_kept_then_collected(self):
+
+        first = Page(title='First', style='p { color: red }')
+        first.save()
+        second = Page(title='Second', style='p { color: red }')
+        second.save()
+        old_hash = first.style_hash
+        old_file = os.path.join(self.media_root, styles.style_name(old_hash))
+
+        for page in (first, second):
+            page = Page.objects.get(id=page.id)
+            page.style = 'p { color: blue }'
+            page.save()
+
+        self.assertTrue(os.path.exists(old_file))
+        scheduled = Task.objects.get(name=tasks.collect_style.task_name)
+        self.assertGreater(
+            scheduled.run_after,
+            timezone.now() + timedelta(seconds=styles.retention() - 60),
+        )
+
+        tasks.collect_style(old_hash)
+
+        self.assertFalse(os.path.exists(old_file))
+
+        page = Page.objects.get(id=first.id)
+        os.remove(os.path.join(
+            self.media_root,
+            styles.style_name(page.style_hash),
+        ))
+        response = Client().get(
+            reverse('pages:style', args=(page.style_hash,)),
+        )
+        self.assertEqual(response.content, b'p{color:blue}')
+
+    def test_orphaned_stylesheets_are_collected_after_retention(self):
+
+        orphan = os.path.join(
+            self.media_root,
+            styles.style_name(styles.compile_style('p { color: green }')),
+        )
+
+        tasks.collect_styles()
+        self.assertTrue(os.path.exists(orphan))
+
+        os.utime(orphan, (0, 0))
+        tasks.collect_styles()
+        self.assertFalse(os.path.exists(orphan))
+
+
+class ProfilingTest(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.profile_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            JUSCMS_PROFILE_DIR=self.profile_dir,
+        )
+        self.settings_override.enable()
+        self.page = build_page('Profiled', rows=2, chunks=2)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.profile_dir)
+
+    def test_staff_can_profile_a_page(self):
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        client = Client()
+        client.login(username='admin', password='admin')
+
+        response = client.get('/' + self.page.path, {'juscms_profile': '1'})
+
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertContains(response, 'pages/chunk.html')
+        self.assertContains(response, 'fragment:header')
+        files = sorted(os.listdir(self.profile_dir))
+        self.assertEqual(len(files), 2)
+        with open(os.path.join(self.profile_dir, files[0])) as collapsed:
+            self.assertIn(
+                ';page;page.html;base.html;pages/row.html;pages/chunk.html ',
+                collapsed.read(),
+            )
+        self.assertIsNone(cache.get_page(self.page.path))
+
+    def test_anonymous_profile_request_renders_page(self):
+
+        response = Client().get(
+            '/' + self.page.path,
+            HTTP_X_JUSCMS_PROFILE='1',
+        )
+
+        self.assertContains(response, '<!DOCTYPE html>')
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_reports_are_unique_and_pruned(self):
+
+        with self.settings(JUSCMS_PROFILE_KEEP=2):
+            for i in range(3):
+                profiling.profile_render(lambda: None, self.page.path)
+
+        files = os.listdir(self.profile_dir)
+        self.assertEqual(len(files), 4)
+        self.assertEqual(len(set(name.split('.')[0] for name in files)), 2)
+
+
+class ConcurrentTreeTest(TransactionTestCase):
+
+    def create_page(self, i):
+
+        def create():
+            parent = Page.objects.order_by('?').first()
+            Page(title='Page %03d' % i, parent=parent).save()
+
+        try:
+            tree.mutate(create)
+        finally:
+            connection.close()
+
+    def move_page(self, i):
+
+        def move():
+            page, target = Page.objects.order_by('?')[:2]
+            try:
+                move_page(page, target)
+            except InvalidMove:
+                pass
+
+        try:
+            tree.mutate(move)
+        finally:
+            connection.close()
+
+    def test_concurrent_creates_and_moves_keep_tree_intact(self):
+
+        cache.get_cache().clear()
+        for i in range(5):
+            Page(title='Root %d' % i).save()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [
+                pool.submit(
+                    self.move_page if i % 3 == 0 else self.create_page,
+                    i,
+                )
+                for i in range(90)
+            ]
+            for future in futures:
+                future.result()
+
+        self.assertEqual(Page.objects.count(), 65)
+        self.assertEqual(tree.check_tree(), [])
+
+    def test_only_lock_errors_outside_transactions_are_retried(self):
+
+        calls = []
+
+        def fail_once(message):
+            def func():
+                calls.append(message)
+                if len(calls) == 1:
+                    raise OperationalError(message)
+            return func
+
+        with self.settings(JUSCMS_TREE_RETRIES=1):
+            tree.mutate(fail_once('database is locked'))
+            self.assertEqual(len(calls), 2)
+
+            del calls[:]
+            with self.assertRaises(OperationalError):
+                tree.mutate(fail_once('no such column: missing'))
+            self.assertEqual(len(calls), 1)
+
+            del calls[:]
+            with self.assertRaises(OperationalError):
+                with transaction.atomic():
+                    tree.mutate(fail_once('database is locked'))
+            self.assertEqual(len(calls), 1)
+
+
+class MovePageTest(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+
+    def test_move_updates_descendant_paths(self):
+
+        target = build_page('Target')
+        section = build_page('Section')
+        child = build_page('Child', parent=section)
+        grandchild = build_page('Grandchild', parent=child)
+
+        move_page(section, target)
+
+        self.assertEqual(
+            Page.objects.get(id=grandchild.id).path,
+            'target/section/child/grandchild/',
+        )
+        self.assertTrue(
+            Redirect.objects.filter(
+                old_path='section/child/grandchild/',
+                page=grandchild,
+            ).exists()
+        )
+
+    def test_home_slug_is_left_out_of_descendant_paths(self):
+
+        home = Page(title='Home', is_home=True)
+        home.save()
+        child = build_page('Child', parent=home)
+        grandchild = build_page('Grandchild', parent=child)
+
+        self.assertEqual(child.path, 'child/')
+        self.assertEqual(tree.update_paths(child), {})
+
+        Page(title='New Home', is_home=True).save()
+
+        self.assertEqual(
+            Page.objects.get(id=grandchild.id).path,
+            'home/child/grandchild/',
+        )
+        self.assertEqual(tree.check_tree(), [])
+
+    def test_move_queries_do_not_grow_with_subtree_size(self):
+
+        for size in (1, 10, 50):
+            target = build_page('Target %d' % size)
+            root = build_page('Root %d' % size)
+            for i in range(size - 1):
+                build_page('Child %d %d' % (size, i), parent=root)
+            with self.assertQueryBudget(12):
+                move_page(root, target)
+
+    def test_admin_tree_view(self):
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        client = Client()
+        client.login(username='admin', password='admin')
+        build_page('Tree Page')
+
+        response = client.get(reverse('admin:pages_page_tree'))
+
+        self.assertContains(response, 'Tree Page')
+
+    def test_admin_move_view(self):
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        client = Client()
+        client.login(username='admin', password='admin')
+        target = build_page('Target')
+        page = build_page('Page')
+
+        response = client.post(reverse('admin:pages_page_move'), {
+            'page': page.id,
+            'target': target.id,
+            'position': 'last-child',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            Page.objects.get(id=page.id).path,
+            'target/page/',
+        )
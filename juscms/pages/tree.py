@@ -0,0 +1,351 @@
+import contextlib
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.db import (
+    OperationalError,
+    connections,
+    models,
+    router,
+    transaction,
+)
+from django.db.models import Case, When, Value
+from django.db.models.query_utils import DeferredAttribute
+
+from mptt.exceptions import InvalidMove
+
+from jusutils import routers
+
+from . import cache, routing
+
+
+# Rows updated per UPDATE statement, keeping the number of query parameters
+# below SQLite's limit.
+BATCH_SIZE = 400
+
+# Serializes the tree mutations of this process on databases without row
+# locks, see lock_tree.
+_tree_lock = threading.RLock()
+_state = threading.local()
+
+# Error codes of deadlocks and lock timeouts, by database vendor.
+LOCK_ERROR_CODES = {
+    'postgresql': ('40001', '40P01', '55P03'),
+    'mysql': (1205, 1213),
+}
+
+
+@contextlib.contextmanager
+def lock_tree():
+    """
+    Opens a transaction holding the tree lock, so mutations from any process
+    run one at a time and read the tree as the previous one left it. On
+    databases supporting SELECT ... FOR UPDATE the Site rows are locked,
+    since every page belongs to a site, so the lock is taken even before the
+    first page exists. SQLite has no row locks and allows a single writer,
+    so the transaction starts with a write that takes the database write
+    lock, as BEGIN IMMEDIATE would. A lock shared by the threads of this
+    process is taken first, so they wait for each other in process rather
+    than on the database's busy timeout. The request is pinned to the
+    primary first, so the tree is never read from a replica, see
+    jusutils.routers.record_write.
+    """
+    from django.contrib.sites.models import Site
+    from .models import Page
+
+    routers.record_write()
+    using = router.db_for_write(Page)
+    connection = connections[using]
+    row_locks = connection.features.has_select_for_update
+    if not row_locks:
+        _tree_lock.acquire()
+    _state.locked = True
+    try:
+        with transaction.atomic(using=using):
+            if row_locks:
+                list(Site.objects.using(using).select_for_update().order_by(
+                    'pk',
+                ).values_list('pk', flat=True))
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute('UPDATE %s SET id = id WHERE 0 = 1' % (
+                        connection.ops.quote_name(Page._meta.db_table),
+                    ))
+            yield
+    finally:
+        _state.locked = False
+        if not row_locks:
+            _tree_lock.release()
+
+
+def is_lock_error(error, using):
+    """
+    Checks whether a database error is a deadlock or lock timeout, after
+    which the transaction can be retried.
+    """
+    vendor = connections[using].vendor
+    if vendor == 'sqlite':
+        return 'locked' in str(error)
+    if vendor == 'postgresql':
+        code = getattr(error.__cause__, 'pgcode', None)
+    else:
+        code = error.args[0] if error.args else None
+    return code in LOCK_ERROR_CODES.get(vendor, ())
+
+
+def tree_changed(page):
+    """
+    Checks whether saving a Page instance will move it in the tree, because
+    its parent or one of the fields its siblings are ordered by changed.
+    """
+    opts = page._mptt_meta
+    return any(
+        value is DeferredAttribute or
+        value != opts.get_raw_field_value(page, name)
+        for name, value in getattr(page, '_mptt_cached_fields', {}).items()
+    )
+
+
+def refresh(page):
+    """
+    Reloads the tree fields of a saved Page instance that is about to move,
+    since MPTT moves it using the values in memory, which are out of date if
+    another editor changed the tree after the instance was loaded. Must be
+    called with the tree lock held.
+    """
+    if page.pk and tree_changed(page):
+        page._mptt_refresh()
+
+
+def mutate(func, page=None):
+    """
+    Runs a function changing the page tree with the tree lock held, see
+    lock_tree. When the database reports a deadlock or lock timeout the
+    function is retried up to 'JUSCMS_TREE_RETRIES' times, 3 by default,
+    with exponential backoff. Only mutations that start their own
+    transaction are retried, since a failure inside a caller's transaction
+    leaves it unusable, so the error is raised to the caller. Calls made
+    while the lock is held, like the saves done by the Page signal
+    receivers, run in the caller's transaction. The caches and routing maps
+    are only updated once the transaction commits, so a failed attempt
+    leaves nothing to undo in this process.
+
+    Parameters:
+        func(function): Called without arguments.
+        page(object): The Page instance func saves or deletes, if any. Its
+            attributes are restored before each retry, since a failed save
+            leaves them half updated.
+
+    Returns:
+        The return value of func.
+    """
+    from .models import Page
+
+    if getattr(_state, 'locked', False):
+        return func()
+    using = router.db_for_write(Page)
+    retries = 0
+    if not connections[using].in_atomic_block:
+        retries = getattr(settings, 'JUSCMS_TREE_RETRIES', 3)
+    snapshot = None
+    if page is not None:
+        snapshot = dict(page.__dict__, _state=copy.copy(page._state))
+    attempt = 0
+    while True:
+        try:
+            with lock_tree():
+                return func()
+        except OperationalError as e:
+            if attempt >= retries or not is_lock_error(e, using):
+                raise
+            if snapshot is not None:
+                page.__dict__.clear()
+                page.__dict__.update(
+                    snapshot,
+                    _state=copy.copy(snapshot['_state']),
+                )
+            time.sleep(0.05 * 2 ** attempt)
+            attempt += 1
+
+
+def check_tree():
+    """
+    Verifies the tree fields and paths of every Page instance.
+
+    Returns:
+        problems(list): A description of each inconsistency found, empty if
+            the tree is intact.
+    """
+    from .models import Page
+
+    pages = dict(
+        (values[0], values) for values in Page.objects.values_list(
+            'id', 'parent_id', 'tree_id', 'lft', 'rght', 'level', 'slug',
+            'path', 'is_home',
+        )
+    )
+    problems = []
+    edges = {}
+    for page_id, parent_id, tree_id, left, right, level, slug, path, \
+            is_home in pages.values():
+        edges.setdefault(tree_id, []).extend((left, right))
+        if parent_id is None:
+            if level != 0:
+                problems.append('Page %d is a root at level %d' % (
+                    page_id, level,
+                ))
+            expected = '' if is_home else slug + '/'
+        else:
+            parent = pages[parent_id]
+            if not (
+                parent[2] == tree_id and
+                parent[3] < left < right < parent[4] and
+                level == parent[5] + 1
+            ):
+                problems.append('Page %d lies outside its parent %d' % (
+                    page_id, parent_id,
+                ))
+            expected = parent[7] + slug + '/'
+        if path != expected:
+            problems.append('Page %d has path %r instead of %r' % (
+                page_id, path, expected,
+            ))
+    for tree_id, values in edges.items():
+        if sorted(values) != list(range(1, len(values) + 1)):
+            problems.append('Tree %d is not numbered 1 to %d' % (
+                tree_id, len(values),
+            ))
+    return problems
+
+
+def batches(items):
+    items = list(items)
+    for i in range(0, len(items), BATCH_SIZE):
+        yield items[i:i + BATCH_SIZE]
+
+
+def update_paths(node):
+    """
+    Recomputes the path of a Page instance and every one of its descendants
+    from the current tree and stores the changed paths in bulk. Old paths are
+    recorded as redirects, removed from the page cache and the routing
+    caches are invalidated once for the whole subtree. The number of queries
+    does not depend on the size of the subtree, apart from one UPDATE per
+    BATCH_SIZE changed pages. The caches are updated once the transaction
+    commits, see pages.models.invalidate_page. Like Page.build_path, the
+    paths below the home page leave out its slug.
+
+    Parameters:
+        node(object): A Page instance with up to date tree fields. Its path
+            attribute is updated in place.
+
+    Returns:
+        changed(dictionary): Maps the ids of changed pages to a tuple of
+            their old and new paths.
+    """
+    from .models import Page, Redirect
+
+    # The bulk writes below send no save signals, so the request is pinned
+    # to the primary here. The paths must also be computed from the primary.
+    routers.record_write()
+    opts = node._mptt_meta
+    site_id = node.site_id
+    tree_id = getattr(node, opts.tree_id_attr)
+    left = getattr(node, opts.left_attr)
+    right = getattr(node, opts.right_attr)
+
+    prefix = ''.join(
+        slug + '/' for slug in Page.objects.filter(
+            tree_id=tree_id,
+            lft__lt=left,
+            rght__gt=right,
+            is_home=False,
+        ).order_by('lft').values_list('slug', flat=True)
+    )
+    subtree = Page.objects.filter(
+        tree_id=tree_id,
+        lft__gte=left,
+        lft__lte=right,
+    ).order_by('lft').values_list('id', 'parent_id', 'slug', 'path', 'is_home')
+
+    new_paths = {}
+    changed = {}
+    for page_id, parent_id, slug, path, is_home in subtree:
+        if is_home:
+            new_paths[page_id] = ''
+            continue
+        new_path = new_paths.get(parent_id, prefix) + slug + '/'
+        new_paths[page_id] = new_path
+        if path != new_path:
+            changed[page_id] = (path, new_path)
+    node.path = new_paths.get(node.pk, node.path)
+    if not changed:
+        return changed
+
+    for batch in batches(changed.items()):
+        ids = [page_id for page_id, paths in batch]
+        Page.objects.filter(id__in=ids).update(
+            path=Case(
+                *[
+                    When(id=page_id, then=Value(paths[1]))
+                    for page_id, paths in batch
+                ],
+                output_field=models.CharField()
+            )
+        )
+
+    old_paths = [paths[0] for paths in changed.values() if paths[0]]
+    live_paths = [paths[1] for paths in changed.values()]
+    for batch in batches(old_paths + live_paths):
+        Redirect.objects.filter(site_id=site_id, old_path__in=batch).delete()
+    Redirect.objects.bulk_create([
+        Redirect(site_id=site_id, old_path=paths[0], page_id=page_id)
+        for page_id, paths in changed.items() if paths[0]
+    ])
+
+    def update_caches():
+        cache.delete_page(*old_paths, site_id=site_id)
+        for old_path, new_path in changed.values():
+            if old_path:
+                routing.redirects.move(old_path, new_path, site_id)
+            routing.missing_paths.discard((site_id, new_path))
+        routing.redirects.advance(routing.bump_version())
+    transaction.on_commit(update_caches, using=node._state.db)
+    return changed
+
+
+def move_page(page, target, position='last-child'):
+    """
+    Moves a Page instance and its subtree relative to a target Page instance
+    with a single MPTT move, then updates every affected path in bulk. Runs
+    in one transaction holding the tree lock, see mutate. Raises InvalidMove
+    if the target belongs to another site.
+
+    Parameters:
+        page(object): The Page instance to move.
+        target(object): The Page instance to move relative to, or None to
+            make the page a root page.
+        position(string): One of 'first-child', 'last-child', 'left' or
+            'right', as accepted by django-mptt.
+
+    Returns:
+        page(object): The moved Page instance, reloaded from the database.
+    """
+    from .models import Page
+
+    def move():
+        moved = Page.objects.get(pk=page.pk)
+        if moved.is_home:
+            raise InvalidMove('The home page cannot be moved.')
+        node = None
+        if target is not None:
+            node = Page.objects.get(pk=target.pk)
+            if node.site_id != moved.site_id:
+                raise InvalidMove('A page cannot move to another site.')
+        Page.objects.move_node(moved, node, position)
+        update_paths(moved)
+        return moved
+
+    return mutate(move)
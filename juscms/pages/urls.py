@@ -1,8 +1,30 @@
 from django.conf.urls import url
 
-from . import views
+from . import api, views
 
 urlpatterns = [
+    url(
+        r'^$',
+        views.BaseView.as_view(),
+        {'path': ''},
+        name='home',
+    ),
+    url(
+        r'^styles/(?P<style_hash>[0-9a-f]+)\.css$',
+        views.StyleView.as_view(),
+        name='style',
+    ),
+    # Page paths never contain a dot, so the API paths shadow no page.
+    url(
+        r'^api/page\.json$',
+        api.PageAPIView.as_view(),
+        name='api_page',
+    ),
+    url(
+        r'^api/pages\.json$',
+        api.PageListAPIView.as_view(),
+        name='api_pages',
+    ),
     url(
         r'^(?P<path>[a-zA-Z0-9\-\/]+)$',
         views.BaseView.as_view(),
@@ -1,14 +1,35 @@
-from django.shortcuts import render, get_object_or_404
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import (
+    HttpResponse,
+    HttpResponsePermanentRedirect,
+    Http404,
+)
+from django.utils.cache import add_never_cache_headers, patch_cache_control
 from django.views.generic import View
 
-from .models import Page
+from . import cache, profiling, routing, sites, styles
+from .render import load_page
 
 
 class BaseView(View):
     def get(self, request, path):
         """
         This method is called when a client machine requests a url
-        that fits the url pattern to call basic content pages.
+        that fits the url pattern to call basic content pages. Rendered pages
+        are served from the page cache when possible and rendered and stored
+        in the cache on a miss. The cached body and the Header and Footer
+        fragments are stored separately and stitched together here. Paths
+        recently found not to exist are answered from the negative lookup
+        cache without a database query, and paths that used to belong to a
+        page are permanently redirected to its current path.
+
+        The site is resolved from the request host, see pages.sites, and
+        pages, fragments and routes are looked up for that site only.
+
+        Users with the 'pages.profile_page' permission can add the
+        'juscms_profile' query parameter or the 'X-Juscms-Profile' header to
+        get a profile of the page render instead, see pages.profiling.
 
         Parameters:
             self(class): The class that calls this method. In this case it is
@@ -19,18 +40,99 @@ class BaseView(View):
                 pages/urls.py. This parameter is used to retrieve a page
                 instance to render.
 
-        Returns(function): The render function used to pass variables to the
-            HTML template which is generated and sent to the client machine.
-        """
-        instance = get_object_or_404(Page, path=path)
-        context = {
-            'instance': instance,
-        }
-        return render(
-            request,
-            instance.template,
-            context,
+        Returns(object): An HttpResponse containing the rendered page.
+        """
+        site_id = sites.get_site_id(request)
+        if profiling.requested(request):
+            return self.profile_page(request, path, site_id)
+        entry = cache.get_page(path, site_id)
+        if entry is None:
+            new_path = routing.redirects.get(path, site_id)
+            if new_path is not None:
+                return HttpResponsePermanentRedirect(
+                    routing.page_url(new_path),
+                )
+            if (site_id, path) in routing.missing_paths:
+                raise Http404('No Page matches the given query.')
+            content = cache.render_once(
+                path,
+                lambda: self.render_page(request, path, site_id),
+                site_id,
+            )
+        else:
+            content, stale = entry
+            if stale:
+                cache.refresh_page(path, site_id)
+        cache.record_hit(path, site_id)
+        return HttpResponse(content)
+
+    def render_page(self, request, path, site_id):
+        """
+        Renders the Page instance for a path on a site into page parts for
+        the cache.
+        Only the columns the templates use are loaded, into the lightweight
+        render objects from pages.render, with a fixed number of queries
+        whatever the size of the page. Raises Http404 if there is no Page
+        instance with the path and records the path in the negative lookup
+        cache.
+        """
+        version = routing.get_version()
+        instance = load_page(path=path, site_id=site_id)
+        if instance is None:
+            routing.missing_paths.add((site_id, path), version)
+            raise Http404('No Page matches the given query.')
+        return cache.render_page(instance, request)
+
+    def profile_page(self, request, path, site_id):
+        """
+        Renders the Page instance for a path under the profiler, bypassing
+        the page cache, and returns the plain text report. The report files
+        are stored on the server, see pages.profiling.profile_render.
+        """
+        report = profiling.profile_render(
+            lambda: self.render_page(request, path, site_id),
+            path,
+            site_id,
+        )
+        response = HttpResponse(
+            report,
+            content_type='text/plain; charset=utf-8',
         )
+        add_never_cache_headers(response)
+        return response
 
 
+class StyleView(View):
+    def get(self, request, style_hash):
+        """
+        Serves a compiled page stylesheet from storage. Stylesheets are named
+        after their content, so they never change and can be cached by
+        browsers and proxies for 'JUSCMS_STYLE_MAX_AGE' seconds, a year by
+        default. In production the web server can serve the 'styles'
+        directory of MEDIA_ROOT at the same URL instead. A missing
+        stylesheet that a page uses is compiled again, see
+        pages.styles.restore_style.
 
+        Parameters:
+            request(object): The http request object.
+            style_hash(string): The content hash of the stylesheet.
+
+        Returns(object): An HttpResponse containing the stylesheet.
+        """
+        name = styles.style_name(style_hash)
+        if not default_storage.exists(name) and not styles.restore_style(
+            style_hash,
+        ):
+            raise Http404('No stylesheet matches the given query.')
+        with default_storage.open(name, 'rb') as stylesheet:
+            response = HttpResponse(
+                stylesheet.read(),
+                content_type='text/css; charset=utf-8',
+            )
+        patch_cache_control(
+            response,
+            public=True,
+            immutable=True,
+            max_age=getattr(settings, 'JUSCMS_STYLE_MAX_AGE', 31536000),
+        )
+        return response
@@ -0,0 +1,32 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the task queue for checking on failed or stuck work.
+    """
+    list_display = (
+        'name',
+        'args',
+        'status',
+        'attempts',
+        'created',
+        'finished',
+    )
+    list_filter = (
+        'status',
+        'name',
+    )
+    readonly_fields = (
+        'name',
+        'args',
+        'key',
+        'worker',
+        'attempts',
+        'started',
+        'finished',
+        'last_error',
+    )
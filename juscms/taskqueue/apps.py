@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TaskqueueConfig(AppConfig):
+    name = 'taskqueue'
+
+    def ready(self):
+        """
+        Imports the 'tasks' module of every installed app so the functions
+        they register are known to the workers.
+        """
+        autodiscover_modules('tasks')
@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from taskqueue import queue
+
+
+class Command(BaseCommand):
+    help = 'Runs background tasks from the database task queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of distinct tasks claimed at once.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty.',
+        )
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=7,
+            help='Days to keep finished tasks before deleting them.',
+        )
+        parser.add_argument(
+            '--maintenance-interval',
+            type=float,
+            default=60.0,
+            help='Seconds between enqueuing periodic tasks, requeueing '
+                 'stalled tasks and purging finished ones.',
+        )
+
+    def handle(self, *args, **options):
+        next_maintenance = 0
+        try:
+            while True:
+                # Workers run for days, so tasks stalled by another worker
+                # dying are requeued while this one is running.
+                if time.time() >= next_maintenance:
+                    self.maintain(options)
+                    next_maintenance = (
+                        time.time() + options['maintenance_interval']
+                    )
+                count = queue.run_batch(options['batch_size'])
+                if count and options['verbosity'] > 1:
+                    self.stdout.write('Ran %d tasks' % count)
+                if not count:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+    def maintain(self, options):
+        """
+        Enqueues due periodic tasks, requeues stalled tasks and deletes old
+        finished ones.
+        """
+        queue.enqueue_periodic()
+        requeued = queue.requeue_stalled()
+        if requeued:
+            self.stdout.write('Requeued %d stalled tasks' % requeued)
+        queue.purge(timezone.now() - timedelta(days=options['keep_days']))
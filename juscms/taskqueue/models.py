@@ -0,0 +1,102 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """
+    A unit of background work stored in the database and run by the
+    'runworker' management command. See taskqueue.queue for enqueueing.
+
+    Attributes:
+        name(string): Registered name of the function to run.
+        args(string): JSON encoded list of positional arguments.
+        key(string): Hash of the name and arguments. Pending tasks with the
+            same key are identical and only run once.
+        status(string): One of 'pending', 'running', 'done' or 'failed'.
+        worker(string): Identifies the worker that claimed the task.
+        attempts(integer): Number of times the task has been run.
+        max_attempts(integer): Number of attempts before the task is marked
+            as failed.
+        run_after(datetime): The task is not run before this time. Used to
+            back off between retries.
+        created(datetime): When the task was enqueued.
+        started(datetime): When the task was last claimed by a worker.
+        finished(datetime): When the task last completed or failed.
+        last_error(string): Traceback of the last failed attempt.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    name = models.CharField(
+        verbose_name='Task Name',
+        max_length=200,
+    )
+    args = models.TextField(
+        verbose_name='Arguments',
+        default='[]',
+    )
+    key = models.CharField(
+        verbose_name='Deduplication Key',
+        max_length=40,
+        db_index=True,
+    )
+    status = models.CharField(
+        verbose_name='Status',
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        max_length=10,
+        db_index=True,
+    )
+    worker = models.CharField(
+        verbose_name='Worker',
+        blank=True,
+        max_length=40,
+        db_index=True,
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Attempts',
+        default=0,
+    )
+    max_attempts = models.PositiveIntegerField(
+        verbose_name='Max Attempts',
+        default=3,
+    )
+    run_after = models.DateTimeField(
+        verbose_name='Run After',
+        default=timezone.now,
+        db_index=True,
+    )
+    created = models.DateTimeField(
+        verbose_name='Created',
+        auto_now_add=True,
+    )
+    started = models.DateTimeField(
+        verbose_name='Started',
+        blank=True,
+        null=True,
+    )
+    finished = models.DateTimeField(
+        verbose_name='Finished',
+        blank=True,
+        null=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Last Error',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Task'
+        verbose_name_plural = 'Tasks'
+        ordering = ['id']
+
+    def __str__(self):
+        return '%s(%s)' % (self.name, self.args[1:-1])
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import logging
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from jusutils import routers
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+# Maps registered task names to their functions.
+REGISTRY = {}
+
+# Maps the names of periodic tasks to their interval in seconds, and to the
+# time this process next enqueues them.
+PERIODIC = {}
+_next_periodic = {}
+
+
+def task(func):
+    """
+    Decorator that registers a function as a background task. The function
+    gains a 'delay' attribute that enqueues a call to it, and a 'schedule'
+    attribute that enqueues a call to run no sooner than a number of seconds
+    from now. Arguments must be JSON serializable.
+
+    Usage:
+        @task
+        def render_page(page_id):
+            ...
+
+        render_page.delay(42)
+        render_page.schedule(60, 42)
+    """
+    name = '%s.%s' % (func.__module__, func.__name__)
+    REGISTRY[name] = func
+    func.task_name = name
+    func.delay = lambda *args: enqueue(name, *args)
+    func.schedule = lambda countdown, *args: enqueue(
+        name,
+        *args,
+        countdown=countdown
+    )
+    return func
+
+
+def periodic(interval):
+    """
+    Decorator that registers a function without arguments as a task that
+    every worker enqueues each 'interval' seconds, see enqueue_periodic.
+    Workers enqueuing it at once add a single pending task.
+
+    Usage:
+        @periodic(60 * 60)
+        def collect_garbage():
+            ...
+    """
+    def decorator(func):
+        func = task(func)
+        PERIODIC[func.task_name] = interval
+        return func
+    return decorator
+
+
+def enqueue_periodic():
+    """
+    Enqueues the periodic tasks that are due in this process. Called by the
+    'runworker' command between batches.
+
+    Returns:
+        (integer): The number of tasks enqueued.
+    """
+    now = time.time()
+    count = 0
+    for name, interval in sorted(PERIODIC.items()):
+        if _next_periodic.get(name, 0) <= now:
+            enqueue(name)
+            _next_periodic[name] = now + interval
+            count += 1
+    return count
+
+
+def make_key(name, args):
+    data = json.dumps([name, list(args)], sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def enqueue(name, *args, countdown=0):
+    """
+    Adds a task to the queue unless an identical task is already pending.
+    The task is written in the caller's transaction, so it only becomes
+    visible to workers once that transaction commits. A task enqueued with
+    a countdown is not run for that many seconds. An identical pending task
+    that would run sooner is postponed to the same time instead.
+
+    Returns:
+        task(object): The new or already pending Task instance.
+    """
+    key = make_key(name, args)
+    run_after = timezone.now() + timedelta(seconds=countdown)
+    pending = Task.objects.filter(key=key, status=Task.PENDING).first()
+    if pending is not None:
+        if countdown and pending.run_after < run_after:
+            Task.objects.filter(id=pending.id, status=Task.PENDING).update(
+                run_after=run_after,
+            )
+            pending.run_after = run_after
+        return pending
+    return Task.objects.create(
+        name=name,
+        args=json.dumps(list(args)),
+        key=key,
+        max_attempts=getattr(settings, 'JUSCMS_TASK_MAX_ATTEMPTS', 3),
+        run_after=run_after,
+    )
+
+
+def pending_args(name):
+    """
+    Returns the argument lists of the pending and running tasks with a
+    registered name.
+    """
+    return [
+        json.loads(args) for args in Task.objects.filter(
+            name=name,
+            status__in=(Task.PENDING, Task.RUNNING),
+        ).values_list('args', flat=True)
+    ]
+
+
+def claim_batch(size):
+    """
+    Claims up to 'size' distinct pending tasks for this worker, together with
+    every other pending task that has the same key. Claiming is a single
+    conditional UPDATE, so concurrent workers never claim the same task.
+
+    Returns:
+        (list): The claimed Task instances.
+    """
+    worker = uuid.uuid4().hex
+    keys = set()
+    candidates = Task.objects.filter(
+        status=Task.PENDING,
+        run_after__lte=timezone.now(),
+    ).values_list('key', flat=True)
+    for key in candidates.iterator():
+        keys.add(key)
+        if len(keys) >= size:
+            break
+    if not keys:
+        return []
+    routers.record_write()
+    Task.objects.filter(
+        status=Task.PENDING,
+        run_after__lte=timezone.now(),
+        key__in=keys,
+    ).update(
+        status=Task.RUNNING,
+        worker=worker,
+        started=timezone.now(),
+    )
+    return list(Task.objects.filter(worker=worker, status=Task.RUNNING))
+
+
+def run_batch(size=None):
+    """
+    Claims and runs a batch of tasks. Duplicate tasks in the batch are run
+    once and all marked with the outcome. Failed tasks are retried with
+    exponential backoff until they reach their max_attempts.
+
+    Returns:
+        (integer): The number of distinct tasks run.
+    """
+    if size is None:
+        size = getattr(settings, 'JUSCMS_TASK_BATCH_SIZE', 20)
+    claimed = claim_batch(size)
+    groups = {}
+    for item in claimed:
+        groups.setdefault(item.key, []).append(item)
+    for key, group in groups.items():
+        run_group(group)
+    return len(groups)
+
+
+def run_group(group):
+    """
+    Runs a group of identical tasks once and records the outcome on all of
+    them.
+    """
+    first = group[0]
+    ids = [item.id for item in group]
+    routers.record_write()
+    attempts = max(item.attempts for item in group) + 1
+    try:
+        func = REGISTRY[first.name]
+        func(*json.loads(first.args))
+    except Exception:
+        error = traceback.format_exc()
+        logger.error('Task %s failed:\n%s', first, error)
+        if not connection.is_usable():
+            connection.close()
+        if attempts < first.max_attempts:
+            delay = getattr(settings, 'JUSCMS_TASK_RETRY_DELAY', 10)
+            Task.objects.filter(id__in=ids).update(
+                status=Task.PENDING,
+                worker='',
+                attempts=attempts,
+                last_error=error,
+                run_after=timezone.now() + timedelta(
+                    seconds=delay * 2 ** (attempts - 1)
+                ),
+            )
+        else:
+            Task.objects.filter(id__in=ids).update(
+                status=Task.FAILED,
+                attempts=attempts,
+                last_error=error,
+                finished=timezone.now(),
+            )
+    else:
+        Task.objects.filter(id__in=ids).update(
+            status=Task.DONE,
+            attempts=attempts,
+            finished=timezone.now(),
+        )
+
+
+def requeue_stalled():
+    """
+    Puts tasks back in the queue whose worker claimed them more than
+    'JUSCMS_TASK_TIMEOUT' seconds ago without finishing, e.g. because the
+    worker process was killed.
+
+    Returns:
+        (integer): The number of tasks requeued.
+    """
+    timeout = getattr(settings, 'JUSCMS_TASK_TIMEOUT', 60 * 10)
+    routers.record_write()
+    return Task.objects.filter(
+        status=Task.RUNNING,
+        started__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(
+        status=Task.PENDING,
+        worker='',
+    )
+
+
+def purge(older_than):
+    """
+    Deletes finished tasks that completed before 'older_than'.
+    """
+    Task.objects.filter(
+        status=Task.DONE,
+        finished__lt=older_than,
+    ).delete()
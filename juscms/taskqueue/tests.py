@@ -0,0 +1,119 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from . import queue
+from .models import Task
+
+
+calls = []
+
+
+@queue.task
+def record_call(value):
+    calls.append(value)
+
+
+@queue.task
+def always_fail():
+    raise ValueError('Task failed')
+
+
+@queue.task
+def stall_other_task():
+    # Leaves a task claimed by a worker that died after this one started.
+    Task.objects.create(
+        name=record_call.task_name,
+        args='[7]',
+        key=queue.make_key(record_call.task_name, [7]),
+        status=Task.RUNNING,
+        worker='dead',
+        started=timezone.now() - timedelta(days=1),
+    )
+
+
+class QueueTest(TestCase):
+
+    def setUp(self):
+        del calls[:]
+
+    def test_identical_tasks_run_once(self):
+
+        for i in range(5):
+            record_call.delay(42)
+        record_call.delay(43)
+
+        queue.run_batch()
+
+        self.assertEqual(sorted(calls), [42, 43])
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+
+    def test_duplicates_enqueued_concurrently_run_once(self):
+
+        for i in range(3):
+            Task.objects.create(
+                name=record_call.task_name,
+                args='[42]',
+                key=queue.make_key(record_call.task_name, [42]),
+            )
+
+        queue.run_batch()
+
+        self.assertEqual(calls, [42])
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 3)
+
+    def test_failed_task_is_retried_then_failed(self):
+
+        with self.settings(JUSCMS_TASK_RETRY_DELAY=0):
+            always_fail.delay()
+            with self.assertLogs('taskqueue.queue', 'ERROR'):
+                queue.run_batch()
+
+            item = Task.objects.get()
+            self.assertEqual(item.status, Task.PENDING)
+            self.assertEqual(item.attempts, 1)
+
+            with self.assertLogs('taskqueue.queue', 'ERROR'):
+                queue.run_batch()
+                queue.run_batch()
+
+        item = Task.objects.get()
+        self.assertEqual(item.status, Task.FAILED)
+        self.assertIn('Task failed', item.last_error)
+
+    def test_running_worker_requeues_stalled_tasks(self):
+
+        stall_other_task.delay()
+
+        # The worker also runs the periodic tasks, which may touch storage.
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with self.settings(MEDIA_ROOT=media_root):
+            call_command(
+                'runworker',
+                once=True,
+                maintenance_interval=0,
+                stdout=io.StringIO(),
+            )
+
+        self.assertEqual(calls, [7])
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+
+    def test_scheduled_task_waits_for_its_countdown(self):
+
+        record_call.schedule(60, 5)
+        queue.run_batch()
+        self.assertEqual(calls, [])
+
+        record_call.schedule(120, 5)
+
+        item = Task.objects.get()
+        self.assertGreater(
+            item.run_after,
+            timezone.now() + timedelta(seconds=90),
+        )